@@ -0,0 +1,231 @@
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Callable, Iterable
+
+DEFAULT_STORE_PATH = os.getenv("BLOB_STORE_PATH", os.path.join(".cache", "blobs.sqlite3"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha TEXT PRIMARY KEY,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS detections (
+    sha TEXT NOT NULL,
+    version TEXT NOT NULL,
+    tools TEXT NOT NULL,
+    PRIMARY KEY (sha, version)
+);
+CREATE TABLE IF NOT EXISTS trees (
+    sha TEXT PRIMARY KEY,
+    paths BLOB NOT NULL,
+    blobs TEXT NOT NULL
+);
+"""
+
+
+class PartialText(str):
+    """Text that stops before the end of its blob, for example at a byte cap.
+
+    Tools detected from it are cached, but the text is never stored under
+    the blob SHA as if it were the whole file.
+    """
+
+
+class PathPacker:
+    """Incrementally zlib-compress newline-separated paths."""
+
+    def __init__(self):
+        self._compressor = zlib.compressobj()
+        self._chunks: list[bytes] = []
+
+    def add(self, path: str) -> None:
+        self._chunks.append(self._compressor.compress(path.encode("utf-8") + b"\n"))
+
+    def finish(self) -> bytes:
+        self._chunks.append(self._compressor.flush())
+        return b"".join(self._chunks)
+
+
+def pack_paths(paths: Iterable[str]) -> bytes:
+    packer = PathPacker()
+    for path in paths:
+        packer.add(path)
+    return packer.finish()
+
+
+def unpack_paths(data: bytes) -> list[str]:
+    text = zlib.decompress(data).decode("utf-8")
+    return text.split("\n")[:-1]
+
+
+class BlobStore:
+    """Content-addressed store of decoded manifest text and detection results.
+
+    Git blob SHAs identify content, so a blob fetched for one repo serves
+    every other repo (and every later run) with the same file. Detection
+    results are keyed by a version string of the hint tables, so changing
+    the hints re-runs detection without refetching anything. Tree path
+    lists are kept the same way, keyed by tree SHA. Concurrent requests for
+    the same SHA wait on a single fetch. ``prune`` drops whatever the saved
+    snapshots no longer refer to, so the store does not grow with every push.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.stats = {"hits": 0, "fetched": 0, "detected": 0}
+        self._lock = threading.Lock()
+        # One lock and waiter count per blob being looked up, dropped when the last waiter leaves.
+        self._pending: dict[str, list] = {}
+        self._written_trees: set[str] = set()
+        self._written_blobs: set[str] = set()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+        self._connection.commit()
+
+    def text(self, sha: str) -> str | None:
+        with self._lock:
+            row = self._connection.execute("SELECT text FROM blobs WHERE sha = ?", (sha,)).fetchone()
+        return row[0] if row else None
+
+    def has_text(self, sha: str) -> bool:
+        with self._lock:
+            return self._connection.execute("SELECT 1 FROM blobs WHERE sha = ?", (sha,)).fetchone() is not None
+
+    def put_text(self, sha: str, text: str) -> None:
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO blobs VALUES (?, ?)", (sha, text))
+            self._connection.commit()
+            self._written_blobs.add(sha)
+
+    def cached_tools(self, sha: str, version: str) -> set[str] | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT tools FROM detections WHERE sha = ? AND version = ?", (sha, version)
+            ).fetchone()
+        return set(json.loads(row[0])) if row else None
+
+    def put_tools(self, sha: str, version: str, tools: set[str]) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO detections VALUES (?, ?, ?)", (sha, version, json.dumps(sorted(tools)))
+            )
+            self._connection.commit()
+
+    def put_tree(self, sha: str, packed_paths: bytes, blob_shas: dict[str, str]) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO trees VALUES (?, ?, ?)",
+                (sha, packed_paths, json.dumps(blob_shas, sort_keys=True)),
+            )
+            self._connection.commit()
+            self._written_trees.add(sha)
+
+    def tree(self, sha: str) -> tuple[list[str], dict[str, str]] | None:
+        """Return a stored tree's paths and the blob SHAs recorded for its hinted paths."""
+        with self._lock:
+            row = self._connection.execute("SELECT paths, blobs FROM trees WHERE sha = ?", (sha,)).fetchone()
+        return (unpack_paths(row[0]), json.loads(row[1])) if row else None
+
+    def prune(self, tree_shas: Iterable[str]) -> int:
+        """Delete trees not in ``tree_shas``, then blobs and detections no kept tree refers to.
+
+        Trees and blobs written since the last prune are kept as well, so a
+        repo whose scan was incomplete (and saved no snapshot) resumes from
+        them. Returns the number of rows deleted.
+        """
+        with self._lock:
+            keep_trees = set(tree_shas) | self._written_trees
+            keep_blobs = set(self._written_blobs)
+            self._written_trees.clear()
+            self._written_blobs.clear()
+            for sha, blobs in self._connection.execute("SELECT sha, blobs FROM trees"):
+                if sha in keep_trees:
+                    keep_blobs.update(json.loads(blobs).values())
+            connection = self._connection
+            connection.execute("CREATE TEMP TABLE IF NOT EXISTS keep_trees (sha TEXT PRIMARY KEY)")
+            connection.execute("CREATE TEMP TABLE IF NOT EXISTS keep_blobs (sha TEXT PRIMARY KEY)")
+            connection.execute("DELETE FROM keep_trees")
+            connection.execute("DELETE FROM keep_blobs")
+            connection.executemany("INSERT OR IGNORE INTO keep_trees VALUES (?)", ((sha,) for sha in keep_trees))
+            connection.executemany("INSERT OR IGNORE INTO keep_blobs VALUES (?)", ((sha,) for sha in keep_blobs))
+            deleted = sum(
+                connection.execute(f"DELETE FROM {table} WHERE sha NOT IN (SELECT sha FROM {keep})").rowcount
+                for table, keep in (("trees", "keep_trees"), ("blobs", "keep_blobs"), ("detections", "keep_blobs"))
+            )
+            connection.commit()
+        return deleted
+
+    def tools_for(
+        self,
+        sha: str,
+        version: str,
+        fetch_text: Callable[[], str],
+        detect: Callable[[str], set[str]],
+    ) -> set[str]:
+        with self._lock:
+            pending = self._pending.setdefault(sha, [threading.Lock(), 0])
+            pending[1] += 1
+        try:
+            with pending[0]:
+                return self._tools_for(sha, version, fetch_text, detect)
+        finally:
+            with self._lock:
+                pending[1] -= 1
+                if not pending[1]:
+                    del self._pending[sha]
+
+    def _tools_for(
+        self,
+        sha: str,
+        version: str,
+        fetch_text: Callable[[], str],
+        detect: Callable[[str], set[str]],
+    ) -> set[str]:
+        tools = self.cached_tools(sha, version)
+        if tools is not None:
+            with self._lock:
+                self.stats["hits"] += 1
+            return tools
+        text = self.text(sha)
+        if text is None:
+            text = fetch_text()
+            if not isinstance(text, PartialText):
+                self.put_text(sha, text)
+            with self._lock:
+                self.stats["fetched"] += 1
+        tools = detect(text)
+        self.put_tools(sha, version, tools)
+        with self._lock:
+            self.stats["detected"] += 1
+        return tools
+
+    def summary(self) -> str:
+        stats = self.stats
+        return (
+            f"Blob store: {stats['hits']} cached detections, {stats['fetched']} blobs fetched, "
+            f"{stats['detected']} blobs scanned"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+_store: BlobStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> BlobStore | None:
+    global _store
+    if os.getenv("BLOB_STORE", "1") == "0":
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore()
+        return _store
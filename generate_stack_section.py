@@ -1,16 +1,57 @@
+import argparse
+import codecs
+import hashlib
+import json
 import os
 import re
+import threading
 from collections import Counter
-from typing import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
 
 import requests
 from dotenv import load_dotenv
 
+import blob_store
+import http_cache
+import http_client
+import json_stream
+import manifest_parsers
+import readme_sections
+import run_metrics
+from run_metrics import timed
+from stack_stats import RankingPolicy, StackStats
+
 load_dotenv()
 
-README_MARKER_START = "<!--START_SECTION:stack-->"
-README_MARKER_END = "<!--END_SECTION:stack-->"
-GITHUB_API_URL = "https://api.github.com"
+README_SECTION = "stack"
+README_MARKER_START = readme_sections.start_marker(README_SECTION)
+README_MARKER_END = readme_sections.end_marker(README_SECTION)
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_GRAPHQL_URL = f"{GITHUB_API_URL}/graphql"
+DEFAULT_SCAN_WORKERS = int(os.getenv("STACK_SCAN_WORKERS", "8"))
+DEFAULT_SCAN_BACKEND = os.getenv("STACK_SCAN_BACKEND", "rest")
+GRAPHQL_BATCH_SIZE = 20
+RAW_MEDIA_TYPE = "application/vnd.github.raw+json"
+DEFAULT_SNAPSHOT_PATH = os.getenv("STACK_SNAPSHOT_PATH", os.path.join(".cache", "stack_snapshots.json"))
+FORCE_FULL_SCAN = os.getenv("STACK_FULL_SCAN", "") == "1"
+DEFAULT_PREFLIGHT_PATH = os.getenv("STACK_PREFLIGHT_PATH", os.path.join(".cache", "stack_preflight.json"))
+FORCE_RUN = os.getenv("STACK_FORCE", "") == "1"
+NESTED_MANIFESTS_PER_REPO = int(os.getenv("STACK_NESTED_MANIFESTS_PER_REPO", "3"))
+NESTED_MANIFEST_BUDGET = int(os.getenv("STACK_NESTED_MANIFEST_BUDGET", "200"))
+SNAPSHOT_VERSION = 1
+ESTIMATED_MANIFESTS_PER_REPO = 2
+RATE_LIMIT_RESERVE = 50
+# GitHub answers a tree request for an empty repository with 409 (sometimes 404).
+EMPTY_TREE_STATUSES = {404, 409}
+RANKING_POLICIES = {
+    "default": RankingPolicy(),
+    "recent": RankingPolicy(weighting="recency"),
+    "normalized": RankingPolicy(normalize_bytes=True),
+    "active": RankingPolicy(exclude_archived=True),
+}
+DEFAULT_RANKING = os.getenv("STACK_RANKING", "default")
 
 
 BADGE_MAP = {
@@ -202,6 +243,7 @@ CONTENT_HINTS = {
     "mongoose": {"MongoDB"},
     "mongodb": {"MongoDB"},
     "postgres": {"PostgreSQL"},
+    "psycopg": {"PostgreSQL"},
     "mysql": {"MySQL"},
     "sqlite": {"SQLite"},
     "redis": {"Redis"},
@@ -229,6 +271,40 @@ CONTENT_HINTS = {
     "microsoft.net.sdk": {".NET", "C#"},
     "targetframework": {".NET", "C#"},
 }
+# Package names often glue a hint to a common affix: PyMySQL, aioredis,
+# mysqlclient, torchvision, djangorestframework, @vitejs/plugin-react.
+DEPENDENCY_PREFIXES = ("py", "aio", "lib")
+DEPENDENCY_SUFFIXES = ("client", "connector", "db", "js", "py", "vision", "audio", "text", "restframework")
+
+
+MANIFEST_CANDIDATES = (
+    "package.json",
+    "requirements.txt",
+    "pyproject.toml",
+    "Pipfile",
+    "pom.xml",
+    "Cargo.toml",
+    "go.mod",
+    "pubspec.yaml",
+    "composer.json",
+    "Gemfile",
+    "manifest.json",
+    "AndroidManifest.xml",
+    "app/build.gradle",
+    "app/build.gradle.kts",
+    "Directory.Build.props",
+    "vercel.json",
+    "netlify.toml",
+    "tauri.conf.json",
+    "_config.yml",
+)
+
+
+# Manifests under these directories belong to vendored code, build output or
+# test data rather than to the project itself.
+NESTED_MANIFEST_SKIP_DIRS = frozenset(
+    {"node_modules", "vendor", "third_party", "dist", "build", "venv", ".venv", "site-packages", "fixtures", "testdata"}
+)
 
 
 def build_headers() -> dict[str, str]:
@@ -249,20 +325,36 @@ def has_auth(headers: dict[str, str]) -> bool:
 
 
 def fetch_json(url: str, headers: dict[str, str], params: dict | None = None):
-    response = requests.get(url, headers=headers, params=params, timeout=30)
+    response = http_client.get(url, headers=headers, params=params)
     response.raise_for_status()
     return response.json()
 
 
-def fetch_repositories(username: str, headers: dict[str, str]) -> list[dict]:
+def fetch_authenticated_login(headers: dict[str, str]) -> str | None:
+    if not has_auth(headers):
+        return None
+    try:
+        return fetch_json(f"{GITHUB_API_URL}/user", headers).get("login")
+    except (requests.RequestException, ValueError):
+        return None
+
+
+@timed()
+def fetch_repositories(username: str, headers: dict[str, str], authenticated: bool | None = None) -> list[dict]:
+    """List ``username``'s non-fork repos.
+
+    ``authenticated`` selects the token owner's listing (which includes
+    private repos); it defaults to whether a token is present.
+    """
     repos: list[dict] = []
     page = 1
     per_page = 100
-    repo_url = f"{GITHUB_API_URL}/user/repos" if has_auth(headers) else f"{GITHUB_API_URL}/users/{username}/repos"
+    authenticated = has_auth(headers) if authenticated is None else authenticated
+    repo_url = f"{GITHUB_API_URL}/user/repos" if authenticated else f"{GITHUB_API_URL}/users/{username}/repos"
 
     while True:
         params = {"per_page": per_page, "page": page, "sort": "updated", "type": "owner"}
-        if has_auth(headers):
+        if authenticated:
             params = {
                 "per_page": per_page,
                 "page": page,
@@ -289,52 +381,425 @@ def fetch_repositories(username: str, headers: dict[str, str]) -> list[dict]:
     return repos
 
 
+@timed()
 def fetch_languages(repo: dict, headers: dict[str, str]) -> Counter:
     data = fetch_json(repo["languages_url"], headers)
     return Counter(data)
 
 
-def fetch_repo_tree(repo: dict, headers: dict[str, str]) -> list[str]:
+@dataclass
+class TreeListing:
+    sha: str | None = None
+    paths: list[str] = field(default_factory=list)
+    blob_shas: dict[str, str] = field(default_factory=dict)
+    blob_count: int = 0
+    truncated: bool = False
+    packed_paths: bytes | None = None
+
+
+class TreeStreamParser:
+    """Incrementally parse a ``git/trees`` response, one entry at a time.
+
+    Only blob entries accepted by ``keep`` are retained, so memory stays at
+    roughly one network chunk plus the kept paths, however large the tree.
+    With ``pack``, every blob path is also compressed into ``packed_paths``
+    for offline re-detection.
+    """
+
+    def __init__(self, keep: Callable[[str], bool] | None = None, pack: bool = False):
+        self.keep = keep
+        self.listing = TreeListing()
+        self._packer = blob_store.PathPacker() if pack else None
+        self._parser = json_stream.ArrayStreamParser("tree", self._add_entry)
+
+    def feed(self, text: str, final: bool = False) -> None:
+        self._parser.feed(text, final)
+        fields = self._parser.fields
+        self.listing.sha = fields.get("sha", self.listing.sha)
+        self.listing.truncated = bool(fields.get("truncated", False))
+        if final and self._packer is not None:
+            self.listing.packed_paths = self._packer.finish()
+
+    def _add_entry(self, entry: dict) -> None:
+        if entry.get("type") != "blob":
+            return
+        self.listing.blob_count += 1
+        path = entry["path"]
+        if self._packer is not None:
+            self._packer.add(path)
+        if self.keep is None or self.keep(path):
+            self.listing.paths.append(path)
+            if "sha" in entry:
+                self.listing.blob_shas[path] = entry["sha"]
+
+
+def is_hinted_path(path: str) -> bool:
+    return bool(PATH_MATCHER.matching_hints((path,)))
+
+
+def is_nested_manifest(path: str) -> bool:
+    directories = path.split("/")[:-1]
+    return (
+        bool(directories)
+        and manifest_parsers.parser_for(path) is not None
+        and NESTED_MANIFEST_SKIP_DIRS.isdisjoint(directories)
+    )
+
+
+def is_stack_path(path: str) -> bool:
+    return is_hinted_path(path) or is_nested_manifest(path)
+
+
+@timed()
+def fetch_tree(
+    repo: dict,
+    headers: dict[str, str],
+    keep: Callable[[str], bool] | None = None,
+    chunk_size: int = 64 * 1024,
+    pack: bool = False,
+) -> TreeListing:
     branch = repo.get("default_branch", "main")
-    tree = fetch_json(
+    response = http_client.get(
         f"{GITHUB_API_URL}/repos/{repo['full_name']}/git/trees/{branch}",
-        headers,
+        headers=headers,
         params={"recursive": "1"},
+        cache=None,
+        stream=True,
     )
-    return [item["path"] for item in tree.get("tree", []) if item.get("type") == "blob"]
+    with response:
+        response.raise_for_status()
+        parser = TreeStreamParser(keep, pack)
+        try:
+            json_stream.parse_response(response, parser, chunk_size)
+        except ValueError as err:
+            raise requests.RequestException(f"Could not parse tree for {repo['full_name']}: {err}") from err
+    return parser.listing
 
 
-def fetch_file_content(repo: dict, headers: dict[str, str], path: str) -> str:
-    data = fetch_json(f"{GITHUB_API_URL}/repos/{repo['full_name']}/contents/{path}", headers)
-    if data.get("encoding") != "base64" or "content" not in data:
-        return ""
-    import base64
+def fetch_repo_tree(repo: dict, headers: dict[str, str]) -> list[str]:
+    return fetch_tree(repo, headers).paths
 
-    return base64.b64decode(data["content"]).decode("utf-8", errors="ignore")
 
+def read_raw_text(response: requests.Response, max_bytes: int | None = None, chunk_size: int = 64 * 1024) -> str:
+    """Decode a streamed body, reading at most ``max_bytes`` (``MANIFEST_MAX_BYTES`` by default).
 
-def detect_tools_from_paths(paths: Iterable[str]) -> set[str]:
-    detected: set[str] = set()
-    path_set = set(paths)
-    for hint_path, tools in FILE_HINTS.items():
-        if (
-            hint_path in path_set
-            or any(path.startswith(f"{hint_path}/") for path in path_set)
-            or any(path.endswith(f"/{hint_path}") for path in path_set)
-            or any(path.endswith(hint_path) for path in path_set if hint_path.startswith("."))
-            or any(path.endswith(f".{hint_path}") for path in path_set if "." not in hint_path and "/" not in hint_path)
-        ):
-            detected.update(tools)
-    return detected
-
-
-def detect_tools_from_content(content: str) -> set[str]:
-    detected: set[str] = set()
-    lowered = content.lower()
-    for needle, tools in CONTENT_HINTS.items():
-        if needle in lowered:
-            detected.update(tools)
-    return detected
+    A body with more bytes past the cap comes back as ``blob_store.PartialText``;
+    one exactly ``max_bytes`` long is complete.
+    """
+    remaining = manifest_parsers.DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    pieces = []
+    truncated = False
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        run_metrics.metrics.increment("http_bytes", len(chunk))
+        pieces.append(decoder.decode(chunk[:remaining]))
+        if len(chunk) > remaining:
+            truncated = True
+            break
+        remaining -= len(chunk)
+    pieces.append(decoder.decode(b"", final=True))
+    text = "".join(pieces)
+    return blob_store.PartialText(text) if truncated else text
+
+
+def fetch_raw(url: str, headers: dict[str, str], max_bytes: int | None = None) -> str:
+    # The raw media type skips the JSON/base64 wrapping and the 1 MB limit of
+    # the JSON contents API; immutable blobs are cached by the blob store.
+    response = http_client.get(url, headers={**headers, "Accept": RAW_MEDIA_TYPE}, cache=None, stream=True)
+    with response:
+        response.raise_for_status()
+        return read_raw_text(response, max_bytes)
+
+
+@timed()
+def fetch_file_content(repo: dict, headers: dict[str, str], path: str, max_bytes: int | None = None) -> str:
+    return fetch_raw(f"{GITHUB_API_URL}/repos/{repo['full_name']}/contents/{path}", headers, max_bytes)
+
+
+@timed()
+def fetch_blob_content(repo: dict, headers: dict[str, str], sha: str, max_bytes: int | None = None) -> str:
+    return fetch_raw(f"{GITHUB_API_URL}/repos/{repo['full_name']}/git/blobs/{sha}", headers, max_bytes)
+
+
+def hint_tables_version() -> str:
+    tables = {
+        "content": {hint: sorted(tools) for hint, tools in CONTENT_HINTS.items()},
+        "affixes": [DEPENDENCY_PREFIXES, DEPENDENCY_SUFFIXES],
+    }
+    return hashlib.sha256(json.dumps(tables, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def detection_version() -> str:
+    """Hash of every table that decides which tools a repo's files map to."""
+    tables = {
+        "files": {hint: sorted(tools) for hint, tools in FILE_HINTS.items()},
+        "content": {hint: sorted(tools) for hint, tools in CONTENT_HINTS.items()},
+        "affixes": [DEPENDENCY_PREFIXES, DEPENDENCY_SUFFIXES],
+        "manifests": MANIFEST_CANDIDATES,
+        "parsers": manifest_parsers.PARSER_VERSION,
+        "nested": [NESTED_MANIFESTS_PER_REPO, sorted(NESTED_MANIFEST_SKIP_DIRS)],
+        "max_bytes": manifest_parsers.DEFAULT_MAX_BYTES,
+    }
+    return hashlib.sha256(json.dumps(tables, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def manifest_detection_version(path: str) -> str:
+    # Blobs are keyed by content, but how a blob is read depends on its file
+    # name, and how much of it is read depends on the byte cap.
+    parser = manifest_parsers.parser_for(path)
+    kind = f"{parser.__name__}-{manifest_parsers.PARSER_VERSION}" if parser else "text"
+    return f"{hint_tables_version()}:{kind}:{manifest_parsers.DEFAULT_MAX_BYTES}"
+
+
+def inspect_blob(repo: dict, headers: dict[str, str], path: str, sha: str, store: blob_store.BlobStore) -> set[str]:
+    return store.tools_for(
+        sha,
+        manifest_detection_version(path),
+        lambda: fetch_blob_content(repo, headers, sha),
+        lambda text: detect_tools_from_manifest(path, text),
+    )
+
+
+def build_graphql_query(repos: list[dict]) -> str:
+    fields = []
+    for repo_index, repo in enumerate(repos):
+        owner, name = repo["full_name"].split("/", 1)
+        branch = repo.get("default_branch", "main")
+        manifests = " ".join(
+            f"m{manifest_index}: object(expression: {json.dumps(f'{branch}:{candidate}')}) {{ ... on Blob {{ text }} }}"
+            for manifest_index, candidate in enumerate(MANIFEST_CANDIDATES)
+        )
+        fields.append(
+            f"r{repo_index}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ "
+            "languages(first: 100, orderBy: {field: SIZE, direction: DESC}) { edges { size node { name } } } "
+            f"{manifests} }}"
+        )
+    return "query {\n  " + "\n  ".join(fields) + "\n}"
+
+
+def parse_graphql_repository(node: dict) -> tuple[Counter, dict[str, str]]:
+    languages = Counter()
+    for edge in (node.get("languages") or {}).get("edges", []):
+        languages[edge["node"]["name"]] = edge["size"]
+    contents = {}
+    for manifest_index, candidate in enumerate(MANIFEST_CANDIDATES):
+        blob = node.get(f"m{manifest_index}")
+        if blob and blob.get("text") is not None:
+            contents[candidate] = blob["text"]
+    return languages, contents
+
+
+@timed()
+def fetch_graphql_repo_data(
+    repos: list[dict],
+    headers: dict[str, str],
+    batch_size: int = GRAPHQL_BATCH_SIZE,
+) -> dict[str, tuple[Counter, dict[str, str]]]:
+    """Fetch language sizes and root manifest texts for many repos per query.
+
+    Repos whose batch fails are left out, so ``scan_repository`` falls back
+    to the REST calls for them.
+    """
+    prefetched: dict[str, tuple[Counter, dict[str, str]]] = {}
+    batches = [repos[start : start + batch_size] for start in range(0, len(repos), batch_size)]
+    for batch in batches:
+        try:
+            response = http_client.request(
+                "POST",
+                GITHUB_GRAPHQL_URL,
+                headers=headers,
+                json={"query": build_graphql_query(batch)},
+            )
+            response.raise_for_status()
+            data = response.json().get("data") or {}
+        except (requests.RequestException, ValueError) as err:
+            print(f"GraphQL batch failed, using REST for {len(batch)} repositories: {err}")
+            continue
+        for repo_index, repo in enumerate(batch):
+            node = data.get(f"r{repo_index}")
+            if node is not None:
+                prefetched[repo["full_name"]] = parse_graphql_repository(node)
+    print(f"Fetched languages and manifests for {len(prefetched)} repositories in {len(batches)} GraphQL requests")
+    return prefetched
+
+
+class PathHintMatcher:
+    """Match paths against ``FILE_HINTS``-style tables in one pass per path.
+
+    A hint matches a path when it is the whole path, a leading directory, a
+    trailing run of path components, a trailing suffix (hints starting with
+    ``.``), or a trailing extension (hints with no ``.`` or ``/``). Instead of
+    testing every hint against every path, each path is split at its ``/``
+    and ``.`` boundaries and the pieces are looked up in hash indexes.
+    """
+
+    def __init__(self, hints: dict[str, set[str]]):
+        self.hints = hints
+        self.suffix_hints = {hint for hint in hints if hint.startswith(".")}
+        self.extension_hints = {hint for hint in hints if "." not in hint and "/" not in hint}
+
+    def matching_hints(self, paths: Iterable[str]) -> set[str]:
+        hints = self.hints
+        matched: set[str] = set()
+        for path in set(paths):
+            if path in hints:
+                matched.add(path)
+            slash = path.find("/")
+            while slash != -1:
+                if path[:slash] in hints:
+                    matched.add(path[:slash])
+                if path[slash + 1 :] in hints:
+                    matched.add(path[slash + 1 :])
+                slash = path.find("/", slash + 1)
+            dot = path.find(".")
+            while dot != -1:
+                if path[dot:] in self.suffix_hints:
+                    matched.add(path[dot:])
+                if path[dot + 1 :] in self.extension_hints:
+                    matched.add(path[dot + 1 :])
+                dot = path.find(".", dot + 1)
+            if len(matched) == len(hints):
+                break
+        return matched
+
+    def detect(self, paths: Iterable[str]) -> set[str]:
+        detected: set[str] = set()
+        for hint in self.matching_hints(paths):
+            detected.update(self.hints[hint])
+        return detected
+
+
+PATH_MATCHER = PathHintMatcher(FILE_HINTS)
+
+
+def detect_tools_from_paths(paths: Iterable[str], matcher: PathHintMatcher | None = None) -> set[str]:
+    return (matcher or PATH_MATCHER).detect(paths)
+
+
+def build_trie_pattern(words: Iterable[str]) -> str:
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class ContentHintScanner:
+    """Find every ``CONTENT_HINTS`` needle in one pass over the text.
+
+    The needles are compiled into a single trie-shaped regex that returns the
+    longest needle at each match. Needles hidden by that match (shorter ones
+    inside it, or ones starting inside it and running past its end) are
+    covered by tables precomputed per needle, so the result is the same set
+    a separate substring test per needle would give. Input can arrive in
+    chunks; only the current chunk is lowercased, and enough of its tail is
+    carried over to catch needles spanning a chunk boundary.
+    """
+
+    def __init__(self, hints: dict[str, set[str]], chunk_size: int = 64 * 1024):
+        self.hints = hints
+        self.chunk_size = chunk_size
+        self.pattern = re.compile(build_trie_pattern(hints))
+        self.overlap = max((len(needle) for needle in hints), default=1) - 1
+        self.all_tools = set().union(*hints.values()) if hints else set()
+        self.implied: dict[str, set[str]] = {}
+        self.continuations: dict[str, list[tuple[int, str]]] = {}
+        for needle in hints:
+            self.implied[needle] = set().union(*(tools for other, tools in hints.items() if other in needle))
+            self.continuations[needle] = [
+                (offset, other)
+                for offset in range(1, len(needle))
+                for other in hints
+                if len(other) > len(needle) - offset and other.startswith(needle[offset:])
+            ]
+
+    def scan_chunks(self, chunks: Iterable[str]) -> set[str]:
+        detected: set[str] = set()
+        carry = ""
+        for chunk in chunks:
+            text = carry + chunk.lower()
+            for match in self.pattern.finditer(text):
+                needle = match.group()
+                detected.update(self.implied[needle])
+                start = match.start()
+                for offset, other in self.continuations[needle]:
+                    if text.startswith(other, start + offset):
+                        detected.update(self.hints[other])
+            if detected >= self.all_tools:
+                break
+            carry = text[-self.overlap :] if self.overlap else ""
+        return detected
+
+    def scan(self, content: str) -> set[str]:
+        size = self.chunk_size
+        return self.scan_chunks(content[start : start + size] for start in range(0, len(content), size))
+
+
+CONTENT_SCANNER = ContentHintScanner(CONTENT_HINTS)
+
+
+def detect_tools_from_content(content: str, scanner: ContentHintScanner | None = None) -> set[str]:
+    return (scanner or CONTENT_SCANNER).scan(content)
+
+
+def detect_tools_from_chunks(chunks: Iterable[str], scanner: ContentHintScanner | None = None) -> set[str]:
+    return (scanner or CONTENT_SCANNER).scan_chunks(chunks)
+
+
+class DependencyHintMatcher:
+    """Map declared dependency names to tools with ``CONTENT_HINTS``.
+
+    A hint matches a name when only separators or a known affix touch it,
+    so ``next`` matches ``next-auth`` and ``mysql`` matches ``PyMySQL`` and
+    ``mysqlclient``, but ``next`` does not match ``nextcloud`` and
+    ``react`` does not match ``preact``.
+    """
+
+    def __init__(
+        self,
+        hints: dict[str, set[str]],
+        prefixes: Iterable[str] = DEPENDENCY_PREFIXES,
+        suffixes: Iterable[str] = DEPENDENCY_SUFFIXES,
+    ):
+        self.hints = hints
+        needles = "|".join(map(re.escape, sorted(hints, key=len, reverse=True)))
+        prefix = "|".join(map(re.escape, prefixes))
+        suffix = "|".join(map(re.escape, suffixes))
+        self.pattern = re.compile(f"(?<![a-z])(?:{prefix})?({needles})(?:{suffix})?(?![a-z])")
+
+    def detect(self, names: Iterable[str]) -> set[str]:
+        detected: set[str] = set()
+        for name in names:
+            for match in self.pattern.finditer(name.lower()):
+                detected.update(self.hints[match.group(1)])
+        return detected
+
+
+DEPENDENCY_MATCHER = DependencyHintMatcher(CONTENT_HINTS)
+
+
+def detect_tools_from_manifest(path: str, content: str, max_bytes: int | None = None) -> set[str]:
+    """Detect tools in a manifest, reading only its dependency declarations when the format is known.
+
+    Formats without a parser fall back to the substring scan. Either way at
+    most ``max_bytes`` of the content is read.
+    """
+    size = CONTENT_SCANNER.chunk_size
+    chunks = (content[start : start + size] for start in range(0, len(content), size))
+    names = manifest_parsers.dependency_names(path, chunks, max_bytes)
+    if names is None:
+        return detect_tools_from_chunks(manifest_parsers.capped(chunks, max_bytes))
+    return DEPENDENCY_MATCHER.detect(names)
 
 
 def normalize_language_name(name: str) -> str | None:
@@ -363,78 +828,493 @@ def normalize_language_name(name: str) -> str | None:
     return mapping.get(name)
 
 
-def gather_stack(username: str) -> tuple[list[str], list[str]]:
-    headers = build_headers()
-    repos = fetch_repositories(username, headers)
-    print(f"Scanning {len(repos)} non-fork repositories for {username}")
-    language_counts: Counter = Counter()
-    tool_counts: Counter = Counter()
+@dataclass
+class RepoScan:
+    languages: Counter
+    tools: set[str]
+    log: list[str] = field(default_factory=list)
+    tree_sha: str | None = None
+    complete: bool = True
+    manifest_count: int = 0
+    deferred: bool = False
 
-    for index, repo in enumerate(repos, start=1):
-        repo_name = repo["full_name"]
-        print(f"[{index}/{len(repos)}] Scanning {repo_name}")
-
-        repo_languages = fetch_languages(repo, headers)
-        language_counts.update(repo_languages)
-        if repo_languages:
-            top_languages = ", ".join(
-                language for language, _ in repo_languages.most_common(5)
-            )
-            print(f"  Languages: {top_languages}")
-        else:
-            print("  Languages: none reported by GitHub")
 
+def manifest_candidates(paths: Iterable[str]) -> list[str]:
+    path_set = set(paths)
+    return [candidate for candidate in MANIFEST_CANDIDATES if candidate in path_set]
+
+
+def select_nested_manifests(
+    paths: Iterable[str],
+    blob_shas: dict[str, str],
+    limit: int | None = None,
+    skip_shas: Iterable[str] = (),
+) -> list[str]:
+    """Pick up to ``limit`` nested manifests worth fetching, best first.
+
+    Each pick is the candidate that adds the most novelty: a manifest kind
+    and top-level directory not covered yet, then the shallowest path.
+    Manifests whose blob SHA was already chosen (or is in ``skip_shas``,
+    such as the root manifests) are identical files and are skipped.
+    """
+    limit = NESTED_MANIFESTS_PER_REPO if limit is None else limit
+    remaining = sorted(path for path in paths if is_nested_manifest(path))
+    seen_shas = set(skip_shas)
+    kinds: Counter = Counter()
+    areas: Counter = Counter()
+    selected: list[str] = []
+    while remaining and len(selected) < limit:
+        remaining = [path for path in remaining if blob_shas.get(path) not in seen_shas]
+        if not remaining:
+            break
+        best = min(
+            remaining,
+            key=lambda path: (
+                kinds[path.rsplit("/", 1)[1]] + areas[path.split("/", 1)[0]],
+                path.count("/"),
+                path,
+            ),
+        )
+        remaining.remove(best)
+        selected.append(best)
+        kinds[best.rsplit("/", 1)[1]] += 1
+        areas[best.split("/", 1)[0]] += 1
+        if best in blob_shas:
+            seen_shas.add(blob_shas[best])
+    return selected
+
+
+def manifests_to_inspect(paths: list[str], blob_shas: dict[str, str]) -> tuple[list[str], list[str]]:
+    """Return the root manifests and the selected nested manifests of a tree."""
+    root = manifest_candidates(paths)
+    root_shas = [blob_shas[path] for path in root if path in blob_shas]
+    return root, select_nested_manifests(paths, blob_shas, skip_shas=root_shas)
+
+
+class ManifestBudget:
+    """Nested-manifest fetches left for one run, shared by the scan threads."""
+
+    def __init__(self, total: int = NESTED_MANIFEST_BUDGET):
+        self.remaining = total
+        self._lock = threading.Lock()
+
+    def take(self, count: int) -> int:
+        with self._lock:
+            granted = min(count, max(self.remaining, 0))
+            self.remaining -= granted
+            return granted
+
+
+def inspect_manifests(
+    repo: dict,
+    headers: dict[str, str],
+    paths: list[str],
+    log: list[str],
+    executor: ThreadPoolExecutor | None = None,
+    contents: dict[str, str] | None = None,
+    blob_shas: dict[str, str] | None = None,
+    budget: ManifestBudget | None = None,
+) -> tuple[set[str], bool, int]:
+    """Detect tools in a repo's manifests.
+
+    Returns the tools, whether every manifest could be read, and how many
+    manifests were inspected. Nested manifests already in the blob store are
+    free; the others are fetched only while ``budget`` lasts, and a repo cut
+    short by it is reported incomplete so the next run picks it up again.
+    """
+    blob_shas = blob_shas or {}
+    store = blob_store.get_store() if blob_shas else None
+    candidates, nested = manifests_to_inspect(paths, blob_shas)
+    skipped = 0
+    if nested and budget is not None:
+        charged = [
+            path for path in nested if store is None or path not in blob_shas or not store.has_text(blob_shas[path])
+        ]
+        granted = set(charged[: budget.take(len(charged))])
+        skipped = len(charged) - len(granted)
+        nested = [path for path in nested if path in granted or path not in charged]
+
+    def inspect(candidate: str, is_nested: bool = False) -> set[str] | None:
+        if contents is not None and not is_nested:
+            if store is not None and candidate in blob_shas and candidate in contents:
+                text = contents[candidate]
+                return store.tools_for(
+                    blob_shas[candidate],
+                    manifest_detection_version(candidate),
+                    lambda: text,
+                    lambda text: detect_tools_from_manifest(candidate, text),
+                )
+            return detect_tools_from_manifest(candidate, contents.get(candidate, ""))
         try:
-            paths = fetch_repo_tree(repo, headers)
-            print(f"  Indexed {len(paths)} files")
+            if store is not None and candidate in blob_shas:
+                return inspect_blob(repo, headers, candidate, blob_shas[candidate], store)
+            return detect_tools_from_manifest(candidate, fetch_file_content(repo, headers, candidate))
+        except http_client.RateLimitExhausted:
+            raise
         except requests.RequestException:
-            paths = []
-            print("  Could not fetch repository tree")
+            return None
 
+    jobs = [(candidate, False) for candidate in candidates] + [(candidate, True) for candidate in nested]
+    results = executor.map(lambda job: inspect(*job), jobs) if executor else map(lambda job: inspect(*job), jobs)
+    detected: set[str] = set()
+    complete = True
+    for (candidate, _), tools in zip(jobs, results):
+        log.append(f"  Inspecting {candidate}")
+        if tools is None:
+            log.append(f"  Failed to inspect {candidate}")
+            complete = False
+            continue
+        detected.update(tools)
+    if skipped:
+        log.append(f"  Deferred {skipped} nested manifests: the run's manifest budget is spent")
+        complete = False
+    return detected, complete, len(jobs)
+
+
+def scan_repository(
+    repo: dict,
+    headers: dict[str, str],
+    manifest_executor: ThreadPoolExecutor | None = None,
+    prefetched: tuple[Counter, dict[str, str]] | None = None,
+    snapshot: dict | None = None,
+    budget: ManifestBudget | None = None,
+) -> RepoScan:
+    log: list[str] = []
+    repo_languages, contents = prefetched if prefetched else (fetch_languages(repo, headers), None)
+    if repo_languages:
+        top_languages = ", ".join(
+            language for language, _ in repo_languages.most_common(5)
+        )
+        log.append(f"  Languages: {top_languages}")
+    else:
+        log.append("  Languages: none reported by GitHub")
+
+    complete = True
+    store = blob_store.get_store()
+    tree_sha, paths, blob_shas = None, [], {}
+    # The listing's ``size`` is in KB and updated lazily, so only the tree
+    # response can tell an empty repository apart from a small one.
+    try:
+        listing = fetch_tree(repo, headers, keep=is_stack_path, pack=store is not None)
+        tree_sha, paths, blob_shas = listing.sha, listing.paths, listing.blob_shas
+        log.append(f"  Indexed {listing.blob_count} files ({len(paths)} matching stack hints)")
+        if store is not None and tree_sha and listing.packed_paths is not None:
+            store.put_tree(tree_sha, listing.packed_paths, blob_shas)
+    except http_client.RateLimitExhausted:
+        raise
+    except requests.HTTPError as err:
+        # An empty repository is a finished scan with no paths; other
+        # errors may be transient, so the repo is retried next run.
+        if err.response is not None and err.response.status_code in EMPTY_TREE_STATUSES:
+            log.append("  Repository is empty")
+        else:
+            complete = False
+            log.append("  Could not fetch repository tree")
+    except requests.RequestException:
+        complete = False
+        log.append("  Could not fetch repository tree")
+
+    if (
+        tree_sha
+        and snapshot
+        and snapshot.get("tree_sha") == tree_sha
+        and snapshot.get("detection_version") == detection_version()
+    ):
+        detected_tools = set(snapshot["tools"])
+        manifest_count = snapshot.get("manifest_count", 0)
+        log.append("  Tree unchanged; reusing detected tools")
+    else:
         detected_tools = detect_tools_from_paths(paths)
+        manifest_tools, manifests_complete, manifest_count = inspect_manifests(
+            repo, headers, paths, log, manifest_executor, contents, blob_shas, budget
+        )
+        detected_tools.update(manifest_tools)
+        complete = complete and manifests_complete
+
+    if detected_tools:
+        log.append(f"  Tools: {', '.join(sorted(detected_tools))}")
+    else:
+        log.append("  Tools: none detected")
+    return RepoScan(repo_languages, detected_tools, log, tree_sha, complete, manifest_count)
+
+
+def scan_repositories(
+    repos: list[dict],
+    headers: dict[str, str],
+    workers: int = 1,
+    prefetched: dict[str, tuple[Counter, dict[str, str]]] | None = None,
+    snapshots: dict[str, dict] | None = None,
+    budget: ManifestBudget | None = None,
+):
+    """Yield ``(repo, scan)`` for each repo in listing order.
+
+    With more than one worker, repositories and their manifest fetches are
+    scanned concurrently, but results are still yielded in the input order so
+    aggregation and logging match the serial path exactly. The one exception
+    is which repos get the last of a nested-manifest ``budget``; the others
+    are reported incomplete and rescanned next run.
+    """
+    prefetched = prefetched or {}
+    snapshots = snapshots or {}
+
+    def scan(repo: dict, manifest_executor: ThreadPoolExecutor | None = None) -> RepoScan:
+        try:
+            return scan_repository(
+                repo,
+                headers,
+                manifest_executor,
+                prefetched.get(repo["full_name"]),
+                snapshots.get(snapshot_key(repo)),
+                budget,
+            )
+        except http_client.RateLimitExhausted as err:
+            return RepoScan(Counter(), set(), [f"  Deferred: {err}"], complete=False, deferred=True)
+
+    if workers <= 1:
+        for repo in repos:
+            yield repo, scan(repo)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as manifest_executor, ThreadPoolExecutor(
+        max_workers=workers
+    ) as repo_executor:
+        results = repo_executor.map(lambda repo: scan(repo, manifest_executor), repos)
+        yield from zip(repos, results)
+
+
+def snapshot_key(repo: dict) -> str:
+    # Repository ids survive renames; fall back to the name for partial payloads.
+    return str(repo["id"]) if repo.get("id") is not None else repo["full_name"]
+
+
+def snapshot_is_current(snapshot: dict | None, repo: dict) -> bool:
+    return (
+        snapshot is not None
+        and snapshot.get("pushed_at") is not None
+        and snapshot.get("pushed_at") == repo.get("pushed_at")
+        and snapshot.get("default_branch") == repo.get("default_branch")
+        and snapshot.get("detection_version") == detection_version()
+    )
+
+
+def snapshot_metadata(repo: dict) -> dict:
+    return {
+        "full_name": repo["full_name"],
+        "size": repo.get("size", 0),
+        "archived": bool(repo.get("archived")),
+    }
+
+
+def build_snapshot(repo: dict, scan: RepoScan) -> dict:
+    return {
+        **snapshot_metadata(repo),
+        "pushed_at": repo.get("pushed_at"),
+        "default_branch": repo.get("default_branch"),
+        "tree_sha": scan.tree_sha,
+        "languages": dict(scan.languages),
+        "tools": sorted(scan.tools),
+        "manifest_count": scan.manifest_count,
+        "detection_version": detection_version(),
+    }
+
 
-        for candidate in (
-            "package.json",
-            "requirements.txt",
-            "pyproject.toml",
-            "Pipfile",
-            "pom.xml",
-            "Cargo.toml",
-            "go.mod",
-            "pubspec.yaml",
-            "composer.json",
-            "Gemfile",
-            "manifest.json",
-            "AndroidManifest.xml",
-            "app/build.gradle",
-            "app/build.gradle.kts",
-            "Directory.Build.props",
-            "vercel.json",
-            "netlify.toml",
-            "tauri.conf.json",
-            "_config.yml",
-        ):
-            if candidate in paths:
-                try:
-                    print(f"  Inspecting {candidate}")
-                    detected_tools.update(detect_tools_from_content(fetch_file_content(repo, headers, candidate)))
-                except requests.RequestException:
-                    print(f"  Failed to inspect {candidate}")
-                    continue
-
-        for tool in detected_tools:
-            tool_counts[tool] += 1
-
-        if detected_tools:
-            print(f"  Tools: {', '.join(sorted(detected_tools))}")
+def redetect_snapshot(snapshot: dict, store: blob_store.BlobStore) -> set[str] | None:
+    """Re-run detection for a snapshot from its stored tree and manifests.
+
+    Returns None when anything needed is missing locally, in which case the
+    repo has to be scanned over the network.
+    """
+    tree = store.tree(snapshot["tree_sha"]) if snapshot.get("tree_sha") else None
+    if tree is None:
+        return None
+    paths, blob_shas = tree
+    tools = detect_tools_from_paths(paths)
+    root, nested = manifests_to_inspect(paths, blob_shas)
+    for candidate in root + nested:
+        sha = blob_shas.get(candidate)
+        text = store.text(sha) if sha else None
+        if text is None:
+            return None
+        tools |= store.tools_for(
+            sha,
+            manifest_detection_version(candidate),
+            lambda: text,
+            lambda text: detect_tools_from_manifest(candidate, text),
+        )
+    return tools
+
+
+def redetect_snapshots(
+    snapshots: dict[str, dict], store: blob_store.BlobStore | None
+) -> tuple[dict[str, dict], int, int]:
+    """Bring snapshots made with older hint tables up to date without the network.
+
+    Returns the updated snapshots, how many were re-detected, and how many
+    could not be re-detected offline; those keep their old tools and version.
+    """
+    version = detection_version()
+    updated = dict(snapshots)
+    redetected = missing = 0
+    for key, snapshot in snapshots.items():
+        if snapshot.get("detection_version") == version:
+            continue
+        tools = redetect_snapshot(snapshot, store) if store is not None else None
+        if tools is None:
+            missing += 1
+            continue
+        updated[key] = {**snapshot, "tools": sorted(tools), "detection_version": version}
+        redetected += 1
+    return updated, redetected, missing
+
+
+def estimate_repo_cost(snapshot: dict | None, backend: str = "rest") -> int:
+    if backend == "graphql":
+        return 1
+    manifest_count = snapshot.get("manifest_count", ESTIMATED_MANIFESTS_PER_REPO) if snapshot else ESTIMATED_MANIFESTS_PER_REPO
+    return 2 + manifest_count
+
+
+def project_scan_cost(repos: list[dict], snapshots: dict[str, dict], backend: str = "rest") -> int:
+    """Estimate the REST requests needed to scan ``repos``.
+
+    Repos scanned before reuse their last manifest count; new ones assume
+    ``ESTIMATED_MANIFESTS_PER_REPO``. With the GraphQL backend only the tree
+    call hits the REST budget.
+    """
+    return sum(estimate_repo_cost(snapshots.get(snapshot_key(repo)), backend) for repo in repos)
+
+
+def split_by_budget(
+    repos: list[dict],
+    snapshots: dict[str, dict],
+    remaining: int | None,
+    backend: str = "rest",
+) -> tuple[list[dict], list[dict]]:
+    if remaining is None:
+        return repos, []
+    budget = remaining - RATE_LIMIT_RESERVE
+    for index, repo in enumerate(repos):
+        budget -= estimate_repo_cost(snapshots.get(snapshot_key(repo)), backend)
+        if budget < 0:
+            return repos[:index], repos[index:]
+    return repos, []
+
+
+def read_snapshot_file(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != SNAPSHOT_VERSION:
+        return {}
+    return data
+
+
+def load_snapshots(path: str) -> dict[str, dict]:
+    return read_snapshot_file(path).get("repos", {})
+
+
+def load_snapshot_owners(path: str) -> dict[str, list[str]]:
+    """Return each account's snapshot keys in the order its listing had them."""
+    return read_snapshot_file(path).get("owners", {})
+
+
+def save_snapshots(path: str, snapshots: dict[str, dict], owners: dict[str, list[str]] | None = None) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(
+            {"version": SNAPSHOT_VERSION, "repos": snapshots, "owners": owners or {}}, file, indent=1, sort_keys=True
+        )
+    os.replace(temp_path, path)
+    store = blob_store.get_store()
+    if store is not None:
+        # Offline re-detection only needs the trees (and their blobs) that snapshots point at.
+        pruned = store.prune(snapshot["tree_sha"] for snapshot in snapshots.values() if snapshot.get("tree_sha"))
+        if pruned:
+            print(f"Pruned {pruned} unreferenced trees, blobs and detections from the blob store")
+
+
+def scan_stacks(
+    repos: list[dict],
+    headers: dict[str, str],
+    previous_snapshots: dict[str, dict],
+    workers: int,
+    backend: str,
+    owners: str,
+) -> tuple[dict[str, tuple[Counter, set[str]]], dict[str, dict]]:
+    """Scan ``repos`` and return each one's (languages, tools) and the new snapshots.
+
+    Both mappings are keyed by ``snapshot_key``. Repos deferred before they
+    were ever scanned have no entry.
+    """
+    stale_repos = [repo for repo in repos if not snapshot_is_current(previous_snapshots.get(snapshot_key(repo)), repo)]
+    print(
+        f"Scanning {len(repos)} non-fork repositories for {owners} "
+        f"({len(stale_repos)} changed since the last snapshot)"
+    )
+    remaining = http_client.rate_limit_remaining(f"{GITHUB_API_URL}/user/repos", headers)
+    print(
+        f"Projected API cost: {project_scan_cost(stale_repos, previous_snapshots, backend)} requests; "
+        f"rate limit remaining: {remaining if remaining is not None else 'unknown'}"
+    )
+    stale_repos, over_budget = split_by_budget(stale_repos, previous_snapshots, remaining, backend)
+    deferred_names = {repo["full_name"] for repo in over_budget}
+    if over_budget:
+        print(f"Deferring {len(over_budget)} repositories to the next run to stay within the rate limit")
+    prefetched = None
+    if backend == "graphql" and stale_repos:
+        if has_auth(headers):
+            prefetched = fetch_graphql_repo_data(stale_repos, headers)
         else:
-            print("  Tools: none detected")
+            print("GraphQL backend needs a token; falling back to REST")
+    stacks: dict[str, tuple[Counter, set[str]]] = {}
+    snapshots: dict[str, dict] = {}
 
-    languages = [
-        name
-        for name, _ in language_counts.most_common()
-        if normalize_language_name(name) in BADGE_MAP
-    ]
+    fresh_scans = scan_repositories(
+        stale_repos, headers, workers, prefetched, previous_snapshots, ManifestBudget(NESTED_MANIFEST_BUDGET)
+    )
+    for index, repo in enumerate(repos, start=1):
+        key = snapshot_key(repo)
+        print(f"[{index}/{len(repos)}] Scanning {repo['full_name']}")
+        snapshot = previous_snapshots.get(key)
+        if snapshot_is_current(snapshot, repo):
+            print(f"  Unchanged since {repo.get('pushed_at')}; using snapshot")
+            snapshots[key] = {**snapshot, **snapshot_metadata(repo)}
+            stacks[key] = Counter(snapshot["languages"]), set(snapshot["tools"])
+            continue
+        if repo["full_name"] in deferred_names:
+            scan = RepoScan(Counter(), set(), ["  Deferred: over the projected rate-limit budget"], deferred=True)
+        else:
+            _, scan = next(fresh_scans)
+        for line in scan.log:
+            print(line)
+        if scan.deferred:
+            # Keep the stale snapshot as a checkpoint; its push marker
+            # still differs, so the next run picks this repo up again.
+            if snapshot is not None:
+                snapshots[key] = snapshot
+                stacks[key] = Counter(snapshot["languages"]), set(snapshot["tools"])
+            continue
+        if scan.complete:
+            snapshots[key] = build_snapshot(repo, scan)
+        stacks[key] = scan.languages, scan.tools
+    return stacks, snapshots
+
+
+def build_stack_stats(rows: Iterable[tuple[dict, Counter, set[str]]]) -> StackStats:
+    stats = StackStats()
+    for repo, repo_languages, detected_tools in rows:
+        stats.add(snapshot_key(repo), repo_languages, detected_tools, repo)
+    return stats
+
+
+def rank_stack(stats: StackStats, ranking: str | None = None) -> tuple[list[str], list[str]]:
+    ranked_languages, ranked_tools = stats.rank(RANKING_POLICIES[ranking or DEFAULT_RANKING])
+    languages = [name for name in ranked_languages if normalize_language_name(name) in BADGE_MAP]
     normalized_languages = []
     seen_languages = set()
     for language in languages:
@@ -443,12 +1323,182 @@ def gather_stack(username: str) -> tuple[list[str], list[str]]:
             normalized_languages.append(normalized)
             seen_languages.add(normalized)
 
-    tools = [name for name, _ in tool_counts.most_common() if name in BADGE_MAP and name not in seen_languages]
-    print(f"Final languages: {', '.join(normalized_languages[:8]) if normalized_languages else 'none'}")
-    print(f"Final tools: {', '.join(tools) if tools else 'none'}")
+    tools = [name for name in ranked_tools if name in BADGE_MAP and name not in seen_languages]
     return normalized_languages[:8], tools
 
 
+def fetch_listings(usernames: list[str], headers: dict[str, str]) -> dict[str, list[dict]]:
+    usernames = list(dict.fromkeys(usernames))
+    if len(usernames) == 1:
+        return {usernames[0]: fetch_repositories(usernames[0], headers)}
+    # /user/repos only lists the token owner's repos; everyone else
+    # needs the per-user listing.
+    login = (fetch_authenticated_login(headers) or "").lower()
+    return {
+        username: fetch_repositories(username, headers, authenticated=username.lower() == login)
+        for username in usernames
+    }
+
+
+@timed()
+def gather_stacks(
+    usernames: list[str],
+    workers: int | None = None,
+    backend: str | None = None,
+    snapshot_path: str | None = None,
+    force_full_scan: bool | None = None,
+    listings: dict[str, list[dict]] | None = None,
+    ranking: str | None = None,
+) -> dict[str, tuple[list[str], list[str]] | None]:
+    """Scan several accounts in one pass and rank each account's stack.
+
+    Repos listed for more than one account are scanned once, and all
+    accounts share one snapshot file, HTTP cache and blob store. An account
+    maps to None while any of its repos was deferred without a snapshot to
+    stand in for it, since ranking the rest would understate its stack.
+    """
+    headers = build_headers()
+    workers = workers if workers is not None else DEFAULT_SCAN_WORKERS
+    backend = backend or DEFAULT_SCAN_BACKEND
+    snapshot_path = snapshot_path or DEFAULT_SNAPSHOT_PATH
+    force_full_scan = FORCE_FULL_SCAN if force_full_scan is None else force_full_scan
+    listings = listings if listings is not None else fetch_listings(usernames, headers)
+
+    repos = list({snapshot_key(repo): repo for listing in listings.values() for repo in listing}.values())
+    previous_snapshots = {} if force_full_scan else load_snapshots(snapshot_path)
+    previous_snapshots, redetected, _ = redetect_snapshots(previous_snapshots, blob_store.get_store())
+    if redetected:
+        print(f"Re-detected {redetected} repositories offline with the current hint tables")
+    stacks, snapshots = scan_stacks(repos, headers, previous_snapshots, workers, backend, ", ".join(listings))
+    save_snapshots(
+        snapshot_path,
+        snapshots,
+        {username: [snapshot_key(repo) for repo in listing] for username, listing in listings.items()},
+    )
+
+    results: dict[str, tuple[list[str], list[str]] | None] = {}
+    for username, listing in listings.items():
+        prefix = f"{username}: " if len(listings) > 1 else ""
+        pending = sum(snapshot_key(repo) not in stacks for repo in listing)
+        if pending:
+            print(f"{prefix}{pending} deferred repositories have never been scanned; not ranking yet")
+            results[username] = None
+            continue
+        stats = build_stack_stats((repo, *stacks[snapshot_key(repo)]) for repo in listing)
+        results[username] = rank_stack(stats, ranking)
+        print_stack(prefix, *results[username])
+    return results
+
+
+def stack_fingerprint(
+    listings: dict[str, list[dict]], readme_paths: Iterable[str], ranking: str | None = None
+) -> str:
+    """Hash everything a run's output depends on.
+
+    That is each repo's push marker, the hint tables, and the stack sections
+    currently in the READMEs, so hand edits to a section are also repaired.
+    """
+    readmes = {}
+    for readme_path in readme_paths:
+        try:
+            with open(readme_path, "r", encoding="utf-8") as file:
+                content = file.read()
+        except OSError:
+            content = ""
+        readmes[readme_path] = [
+            readme_sections.content_digest(content[span.body_start : span.body_end])
+            for span in readme_sections.parse_sections(content)
+            if span.name == README_SECTION
+        ]
+    inputs = {
+        "version": [SNAPSHOT_VERSION, detection_version(), ranking or DEFAULT_RANKING],
+        "repos": {
+            username: [
+                [snapshot_key(repo), repo["full_name"], repo.get("pushed_at"), repo.get("default_branch")]
+                for repo in listing
+            ]
+            for username, listing in listings.items()
+        },
+        "readmes": readmes,
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_preflight(path: str) -> str | None:
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file).get("fingerprint")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def save_preflight(path: str, fingerprint: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump({"fingerprint": fingerprint}, file)
+    os.replace(temp_path, path)
+
+
+def snapshots_settled(listings: dict[str, list[dict]], snapshot_path: str) -> bool:
+    snapshots = load_snapshots(snapshot_path)
+    return all(
+        snapshot_is_current(snapshots.get(snapshot_key(repo)), repo)
+        for listing in listings.values()
+        for repo in listing
+    )
+
+
+def print_stack(prefix: str, languages: list[str], tools: list[str]) -> None:
+    print(f"{prefix}Final languages: {', '.join(languages) if languages else 'none'}")
+    print(f"{prefix}Final tools: {', '.join(tools) if tools else 'none'}")
+
+
+def redetect_stacks(
+    usernames: list[str], snapshot_path: str | None = None, ranking: str | None = None
+) -> dict[str, tuple[list[str], list[str]]]:
+    """Rank each account from its stored snapshots, re-detecting tools offline.
+
+    Nothing is fetched: trees and manifests come from the blob store, so
+    hint table changes can be tried out without spending API quota.
+    """
+    snapshot_path = snapshot_path or DEFAULT_SNAPSHOT_PATH
+    previous_snapshots = load_snapshots(snapshot_path)
+    owners = load_snapshot_owners(snapshot_path)
+    snapshots, redetected, missing = redetect_snapshots(previous_snapshots, blob_store.get_store())
+    print(f"Re-detected {redetected} repositories offline with the current hint tables")
+    if missing:
+        print(f"{missing} repositories are not in the local store and keep their previous tools")
+    save_snapshots(snapshot_path, snapshots, owners)
+
+    usernames = list(dict.fromkeys(usernames))
+    results = {}
+    for username in usernames:
+        if username not in owners:
+            print(f"{username}: no stored listing; run an online scan first")
+        keys = [key for key in owners.get(username, []) if key in snapshots]
+        stats = build_stack_stats(
+            ({"id": key, **snapshots[key]}, Counter(snapshots[key]["languages"]), set(snapshots[key]["tools"]))
+            for key in keys
+        )
+        results[username] = rank_stack(stats, ranking)
+        print_stack(f"{username}: " if len(usernames) > 1 else "", *results[username])
+    return results
+
+
+def gather_stack(
+    username: str,
+    workers: int | None = None,
+    backend: str | None = None,
+    snapshot_path: str | None = None,
+    force_full_scan: bool | None = None,
+    ranking: str | None = None,
+) -> tuple[list[str], list[str]] | None:
+    return gather_stacks([username], workers, backend, snapshot_path, force_full_scan, ranking=ranking)[username]
+
+
 def badge_markdown(name: str) -> str:
     label, logo, logo_color, color = BADGE_MAP[name]
     return (
@@ -457,8 +1507,8 @@ def badge_markdown(name: str) -> str:
     )
 
 
-def build_stack_block(languages: list[str], tools: list[str], featured_tool_count: int = 11) -> str:
-    parts = ["", README_MARKER_START, ""]
+def build_stack_body(languages: list[str], tools: list[str], featured_tool_count: int = 11) -> str:
+    parts = ["", ""]
     featured_tools = tools[:featured_tool_count]
     remaining_tools = tools[featured_tool_count:]
 
@@ -480,34 +1530,133 @@ def build_stack_block(languages: list[str], tools: list[str], featured_tool_coun
         parts.append("")
         parts.append("</details>")
         parts.append("")
-    parts.append(README_MARKER_END)
+    parts.append("")
     return "\n".join(parts)
 
 
+def build_stack_block(languages: list[str], tools: list[str], featured_tool_count: int = 11) -> str:
+    return f"\n{README_MARKER_START}{build_stack_body(languages, tools, featured_tool_count)}{README_MARKER_END}"
+
+
 def replace_stack_block(readme_content: str, new_block: str) -> str:
-    pattern = re.compile(
-        rf"{re.escape(README_MARKER_START)}.*?{re.escape(README_MARKER_END)}",
-        re.DOTALL,
-    )
-    if pattern.search(readme_content):
-        return pattern.sub(new_block.strip(), readme_content)
-    return readme_content
+    spans = readme_sections.parse_sections(new_block)
+    if not spans:
+        return readme_content
+    body = new_block[spans[0].body_start : spans[0].body_end]
+    return readme_sections.replace_sections(readme_content, {README_SECTION: body})
+
+
+def write_stack_section(readme_path: str, languages: list[str], tools: list[str]) -> None:
+    with run_metrics.metrics.span("write_readme"):
+        changed = readme_sections.update_file(readme_path, {README_SECTION: build_stack_body(languages, tools)})
+    print(f"Updated {readme_path} stack section" if changed else f"{readme_path} stack section already up to date")
+
 
+def report_caches() -> None:
+    cache = http_cache.get_cache()
+    if cache is not None:
+        print(cache.summary())
+    store = blob_store.get_store()
+    if store is not None:
+        print(store.summary())
+        for name, value in store.stats.items():
+            run_metrics.metrics.increment(f"blob_store_{name}", value)
 
-def update_readme_stack(readme_path: str = "README.md", username: str | None = None) -> None:
+
+def update_readme_stacks(
+    targets: list[tuple[str, str]],
+    force: bool | None = None,
+    offline: bool = False,
+    ranking: str | None = None,
+) -> None:
+    """Refresh the stack section of each ``(username, readme_path)`` target in one scan.
+
+    The repo listings are fetched first (conditionally, through the HTTP
+    cache); if nothing the output depends on changed since the last complete
+    run, the scan and the README writes are skipped. ``offline`` re-ranks
+    from stored snapshots without touching the network. ``ranking`` names
+    one of ``RANKING_POLICIES``.
+    """
+    usernames = [username for username, _ in targets]
+    readme_paths = [readme_path for _, readme_path in targets]
+    if offline:
+        results = redetect_stacks(usernames, ranking=ranking)
+        for username, readme_path in targets:
+            write_stack_section(readme_path, *results[username])
+        report_caches()
+        return
+
+    force = (FORCE_RUN or FORCE_FULL_SCAN) if force is None else force
+    headers = build_headers()
+    listings = fetch_listings(usernames, headers)
+    fingerprint = stack_fingerprint(listings, readme_paths, ranking)
+    if not force and load_preflight(DEFAULT_PREFLIGHT_PATH) == fingerprint:
+        print("No repository or README changes since the last complete run; skipping the stack scan")
+        report_caches()
+        return
+
+    results = gather_stacks(usernames, listings=listings, ranking=ranking)
+    for username, readme_path in targets:
+        if results[username] is None:
+            # A partial ranking would be committed now and reverted next run.
+            print(f"Keeping the current {readme_path} stack section until {username}'s deferred repos are scanned")
+            continue
+        write_stack_section(readme_path, *results[username])
+    if snapshots_settled(listings, DEFAULT_SNAPSHOT_PATH):
+        # Fingerprint the READMEs as written, so the next run sees them as current.
+        save_preflight(DEFAULT_PREFLIGHT_PATH, stack_fingerprint(listings, readme_paths, ranking))
+    report_caches()
+
+
+def update_readme_stack(
+    readme_path: str = "README.md",
+    username: str | None = None,
+    force: bool | None = None,
+    offline: bool = False,
+    ranking: str | None = None,
+) -> None:
     username = username or os.getenv("GITHUB_USERNAME") or "FahadBinHussain"
-    languages, tools = gather_stack(username)
-    new_block = build_stack_block(languages, tools)
+    update_readme_stacks([(username, readme_path)], force, offline, ranking)
 
-    with open(readme_path, "r", encoding="utf-8") as file:
-        readme_content = file.read()
 
-    updated_content = replace_stack_block(readme_content, new_block)
+def parse_target(value: str) -> tuple[str, str]:
+    username, separator, readme_path = value.partition("=")
+    if not username or not separator or not readme_path:
+        raise argparse.ArgumentTypeError(f"expected USERNAME=README_PATH, got {value!r}")
+    return username, readme_path
 
-    with open(readme_path, "w", encoding="utf-8") as file:
-        file.write(updated_content)
-    print(f"Updated {readme_path} stack section")
+
+def read_targets(path: str) -> list[tuple[str, str]]:
+    with open(path, "r", encoding="utf-8") as file:
+        lines = [line.strip() for line in file]
+    return [parse_target(line) for line in lines if line and not line.startswith("#")]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Refresh the auto-detected stack section of profile READMEs.")
+    parser.add_argument("targets", nargs="*", type=parse_target, metavar="USERNAME=README_PATH")
+    parser.add_argument("--targets-file", help="file with one USERNAME=README_PATH per line")
+    parser.add_argument(
+        "--force", action="store_true", default=None, help="scan even if nothing changed since the last run"
+    )
+    parser.add_argument(
+        "--offline", action="store_true", help="re-run detection on stored trees and manifests without the network"
+    )
+    parser.add_argument("--ranking", choices=sorted(RANKING_POLICIES), help="how repos are weighted when ranking")
+    args = parser.parse_args(argv)
+
+    targets = list(args.targets)
+    if args.targets_file:
+        try:
+            targets.extend(read_targets(args.targets_file))
+        except (OSError, argparse.ArgumentTypeError) as err:
+            parser.error(str(err))
+    if targets:
+        update_readme_stacks(targets, args.force, args.offline, args.ranking)
+    else:
+        update_readme_stack(force=args.force, offline=args.offline, ranking=args.ranking)
 
 
 if __name__ == "__main__":
-    update_readme_stack()
+    main()
+    run_metrics.emit("generate_stack_section")
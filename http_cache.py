@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", os.path.join(".cache", "http_cache.sqlite3"))
+DEFAULT_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+
+def token_identity(headers: dict[str, str] | None) -> str:
+    authorization = (headers or {}).get("Authorization", "")
+    return hashlib.sha256(authorization.encode()).hexdigest() if authorization else "anonymous"
+
+
+class CacheEntry:
+    def __init__(self, etag: str | None, last_modified: str | None, headers: dict[str, str], body: bytes):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.headers = headers
+        self.body = body
+
+    def validators(self) -> dict[str, str]:
+        validators = {}
+        if self.etag:
+            validators["If-None-Match"] = self.etag
+        if self.last_modified:
+            validators["If-Modified-Since"] = self.last_modified
+        return validators
+
+    def to_response(self, url: str, not_modified: requests.Response | None = None) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = self.body
+        response.headers = CaseInsensitiveDict(self.headers)
+        if not_modified is not None:
+            # Rate-limit counters and the like should reflect this request.
+            response.headers.update(not_modified.headers)
+        response.encoding = "utf-8"
+        return response
+
+
+class HttpCache:
+    """SQLite-backed store of validator-bearing GET responses.
+
+    Entries are keyed by URL, query parameters and a hash of the
+    ``Authorization`` header, so private responses never leak across tokens.
+    The least recently used rows are evicted once the bodies exceed
+    ``max_bytes``.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(SCHEMA)
+        self._connection.commit()
+
+    @staticmethod
+    def key(url: str, params: dict | None = None, headers: dict[str, str] | None = None) -> str:
+        query = urlencode(sorted((params or {}).items()))
+        return hashlib.sha256(f"{url}?{query}\n{token_identity(headers)}".encode()).hexdigest()
+
+    def lookup(self, key: str) -> CacheEntry | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT etag, last_modified, headers, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, headers, body = row
+        return CacheEntry(etag, last_modified, json.loads(headers), bytes(body))
+
+    def record_hit(self, key: str) -> None:
+        with self._lock:
+            self.stats["hits"] += 1
+            self._connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._connection.commit()
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.stats["misses"] += 1
+
+    def store(self, key: str, url: str, response: requests.Response) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        body = response.content
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, etag, last_modified, json.dumps(dict(response.headers)), body, len(body), time.time()),
+            )
+            self.stats["stored"] += 1
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self) -> None:
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall():
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.stats["evicted"] += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def size(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def summary(self) -> str:
+        stats = self.stats
+        return (
+            f"HTTP cache: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['stored']} stored, {stats['evicted']} evicted ({self.size() / 1024:.1f} KiB on disk)"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+_cache: HttpCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> HttpCache | None:
+    global _cache
+    if os.getenv("HTTP_CACHE", "1") == "0":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache()
+        return _cache
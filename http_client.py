@@ -0,0 +1,258 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import http_cache
+from run_metrics import metrics
+
+DEFAULT_TIMEOUT = 30
+HOST_TIMEOUTS = {
+    "api.github.com": 30,
+    # The Wakapi instance sleeps on Render's free tier, so the first request
+    # after a quiet hour can take a while to wake it up.
+    "wakapi-qt1b.onrender.com": 60,
+}
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "4"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+MAX_RETRY_WAIT = 60.0
+RETRY_STATUSES = {403, 429, 500, 502, 503, 504}
+# GitHub's secondary rate limits punish bursts of concurrent requests, so
+# keep well under them even when the connection pool is wider.
+MAX_IN_FLIGHT = int(os.getenv("GITHUB_MAX_IN_FLIGHT", "16"))
+LOW_WATERMARK = 100
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+class RateLimitExhausted(requests.RequestException):
+    def __init__(self, reset_at: float):
+        super().__init__(f"rate limit exhausted until {time.strftime('%H:%M:%S', time.localtime(reset_at))}")
+        self.reset_at = reset_at
+
+
+class RateLimitTracker:
+    """Track the ``X-RateLimit-*`` budget per host, token and resource.
+
+    Requests are gated on it: concurrency drops to one request at a time once
+    the budget is under ``low_watermark``. Callers block briefly when the
+    budget resets within ``MAX_RETRY_WAIT``. Otherwise they get
+    ``RateLimitExhausted`` without sending a request that is bound to fail.
+    """
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, low_watermark: int = LOW_WATERMARK, clock=time.time):
+        self.max_in_flight = max_in_flight
+        self.low_watermark = low_watermark
+        self.clock = clock
+        self._budgets: dict[tuple[str, str, str], tuple[int, float]] = {}
+        self._in_flight: dict[tuple[str, str, str], int] = {}
+        self._condition = threading.Condition()
+
+    @staticmethod
+    def bucket(url: str, headers: dict[str, str] | None) -> tuple[str, str, str]:
+        parts = urlsplit(url)
+        resource = "core"
+        if parts.path.startswith("/graphql"):
+            resource = "graphql"
+        elif parts.path.startswith("/search"):
+            resource = "search"
+        return parts.hostname or "", http_cache.token_identity(headers), resource
+
+    def remaining(self, bucket: tuple[str, str, str]) -> int | None:
+        with self._condition:
+            return self._remaining(bucket)
+
+    def _remaining(self, bucket: tuple[str, str, str]) -> int | None:
+        budget = self._budgets.get(bucket)
+        if budget is None or budget[1] <= self.clock():
+            return None
+        return budget[0]
+
+    def _allowed_in_flight(self, remaining: int | None) -> int:
+        if remaining is None or remaining > self.low_watermark:
+            return self.max_in_flight
+        return 1
+
+    def acquire(self, bucket: tuple[str, str, str]) -> None:
+        with self._condition:
+            while True:
+                remaining = self._remaining(bucket)
+                in_flight = self._in_flight.get(bucket, 0)
+                if remaining is not None and remaining <= in_flight:
+                    reset_at = self._budgets[bucket][1]
+                    if in_flight == 0 and reset_at - self.clock() > MAX_RETRY_WAIT:
+                        raise RateLimitExhausted(reset_at)
+                    self._condition.wait(timeout=max(reset_at - self.clock(), 0) + 1 if in_flight == 0 else None)
+                    continue
+                if in_flight < self._allowed_in_flight(remaining):
+                    self._in_flight[bucket] = in_flight + 1
+                    return
+                self._condition.wait()
+
+    def release(self, bucket: tuple[str, str, str], response: requests.Response | None = None) -> None:
+        with self._condition:
+            self._in_flight[bucket] -= 1
+            if response is not None and "X-RateLimit-Remaining" in response.headers:
+                try:
+                    remaining = int(response.headers["X-RateLimit-Remaining"])
+                    reset_at = float(response.headers.get("X-RateLimit-Reset", self.clock() + 3600))
+                except ValueError:
+                    pass
+                else:
+                    previous = self._budgets.get(bucket)
+                    # Responses finish out of order; never let a stale count raise the budget.
+                    if previous is None or previous[1] != reset_at or remaining < previous[0]:
+                        self._budgets[bucket] = (remaining, reset_at)
+            self._condition.notify_all()
+
+
+rate_limits = RateLimitTracker()
+
+
+def rate_limit_remaining(url: str, headers: dict[str, str] | None = None) -> int | None:
+    return rate_limits.remaining(RateLimitTracker.bucket(url, headers))
+
+
+def build_session(pool_size: int = POOL_SIZE) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = build_session()
+        return _session
+
+
+def host_timeout(url: str) -> float:
+    return HOST_TIMEOUTS.get(urlsplit(url).hostname or "", DEFAULT_TIMEOUT)
+
+
+def retry_delay(response: requests.Response | None, attempt: int) -> float | None:
+    """Return how long to wait before retrying, or ``None`` to give up.
+
+    ``Retry-After`` and an exhausted ``X-RateLimit-Reset`` win over the
+    exponential backoff. A 403 without either header is a real permission
+    error and is not retried.
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = None
+            if delay is not None:
+                return delay if delay <= MAX_RETRY_WAIT else None
+
+        if response.headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in response.headers:
+            delay = max(float(response.headers["X-RateLimit-Reset"]) - time.time(), 0) + 1
+            return delay if delay <= MAX_RETRY_WAIT else None
+
+        if response.status_code == 403:
+            return None
+
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**attempt))
+
+
+def response_size(response: requests.Response) -> int:
+    length = response.headers.get("Content-Length")
+    if length and length.isdigit():
+        return int(length)
+    return len(response.content or b"")
+
+
+def request(
+    method: str,
+    url: str,
+    *,
+    headers: dict[str, str] | None = None,
+    params: dict | None = None,
+    timeout: float | None = None,
+    retries: int = MAX_RETRIES,
+    session: requests.Session | None = None,
+    sleep=time.sleep,
+    **kwargs,
+) -> requests.Response:
+    session = session or get_session()
+    timeout = timeout if timeout is not None else host_timeout(url)
+    bucket = rate_limits.bucket(url, headers)
+
+    for attempt in range(retries + 1):
+        rate_limits.acquire(bucket)
+        response = None
+        try:
+            response = session.request(method, url, headers=headers, params=params, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= retries:
+                raise
+            metrics.increment("http_retries")
+            sleep(retry_delay(None, attempt))
+            continue
+        finally:
+            rate_limits.release(bucket, response)
+            metrics.increment("http_requests")
+            # Streamed bodies are often chunked or abandoned early, so their
+            # readers count ``http_bytes`` as the chunks are consumed.
+            if response is not None and not kwargs.get("stream", False):
+                metrics.increment("http_bytes", response_size(response))
+
+        if response.status_code not in RETRY_STATUSES or attempt >= retries:
+            return response
+        delay = retry_delay(response, attempt)
+        if delay is None:
+            if response.headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in response.headers:
+                raise RateLimitExhausted(float(response.headers["X-RateLimit-Reset"]))
+            return response
+        print(f"Retrying {method} {url} after {response.status_code} in {delay:.1f}s")
+        metrics.increment("http_retries")
+        response.close()
+        sleep(delay)
+
+    return response
+
+
+_DEFAULT_CACHE = object()
+
+
+def get(
+    url: str,
+    *,
+    headers: dict[str, str] | None = None,
+    params: dict | None = None,
+    cache=_DEFAULT_CACHE,
+    **kwargs,
+) -> requests.Response:
+    cache = http_cache.get_cache() if cache is _DEFAULT_CACHE else cache
+    if cache is None:
+        return request("GET", url, headers=headers, params=params, **kwargs)
+
+    key = cache.key(url, params, headers)
+    entry = cache.lookup(key)
+    request_headers = dict(headers or {})
+    if entry is not None:
+        request_headers.update(entry.validators())
+
+    response = request("GET", url, headers=request_headers, params=params, **kwargs)
+    if response.status_code == 304 and entry is not None:
+        cache.record_hit(key)
+        metrics.increment("http_cache_hits")
+        return entry.to_response(url, response)
+
+    cache.record_miss()
+    metrics.increment("http_cache_misses")
+    if response.status_code == 200:
+        cache.store(key, url, response)
+    return response
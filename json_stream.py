@@ -0,0 +1,87 @@
+import codecs
+import json
+from typing import Any, Callable
+
+import requests
+
+import run_metrics
+
+
+class ArrayStreamParser:
+    """Incrementally parse a JSON object whose bulk is one array field.
+
+    Elements of ``array_key`` are decoded one at a time and handed to
+    ``on_item``; every other top-level field is decoded whole into
+    ``fields``. Only the unparsed tail of the input is buffered, so memory
+    stays at about one chunk plus one element.
+    """
+
+    def __init__(self, array_key: str, on_item: Callable[[Any], None]):
+        self.array_key = array_key
+        self.on_item = on_item
+        self.fields: dict[str, Any] = {}
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._state = "object"
+        self._key: str | None = None
+
+    def feed(self, text: str, final: bool = False) -> None:
+        buffer = self._buffer + text
+        position = 0
+        while True:
+            position = skip_separators(buffer, position)
+            if position >= len(buffer):
+                break
+            char = buffer[position]
+            if self._state == "object":
+                if char != "{":
+                    raise ValueError("response is not a JSON object")
+                self._state, position = "key", position + 1
+            elif self._state in ("key", "items") and char in "}]":
+                self._state, position = ("done" if char == "}" else "key"), position + 1
+            elif self._state == "array":
+                if char != "[":
+                    raise ValueError(f"{self.array_key} field is not a JSON array")
+                self._state, position = "items", position + 1
+            elif self._state == "done":
+                raise ValueError("unexpected data after JSON object")
+            else:
+                try:
+                    value, end = self._decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    break
+                if self._state == "key":
+                    colon = skip_separators(buffer, end)
+                    if colon >= len(buffer):
+                        break
+                    if buffer[colon] != ":":
+                        raise ValueError("malformed JSON object")
+                    self._key, position = value, colon + 1
+                    self._state = "array" if value == self.array_key else "value"
+                    continue
+                if end == len(buffer) and not final:
+                    # A number or literal may continue in the next chunk.
+                    break
+                position = end
+                if self._state == "value":
+                    self.fields[self._key] = value
+                    self._state = "key"
+                else:
+                    self.on_item(value)
+        self._buffer = buffer[position:]
+        if final and (self._state != "done" or self._buffer.strip()):
+            raise ValueError("truncated JSON response")
+
+
+def skip_separators(text: str, position: int) -> int:
+    while position < len(text) and text[position] in " \t\r\n,":
+        position += 1
+    return position
+
+
+def parse_response(response: requests.Response, parser: ArrayStreamParser, chunk_size: int = 64 * 1024) -> None:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        run_metrics.metrics.increment("http_bytes", len(chunk))
+        parser.feed(decoder.decode(chunk))
+    parser.feed(decoder.decode(b"", final=True), final=True)
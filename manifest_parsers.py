@@ -0,0 +1,256 @@
+import json
+import os
+import re
+from typing import Callable, Iterable, Iterator
+
+DEFAULT_MAX_BYTES = int(os.getenv("MANIFEST_MAX_BYTES", str(512 * 1024)))
+# Bump when a parser changes what it extracts, so stored detections are redone.
+PARSER_VERSION = 1
+
+PACKAGE_JSON_SECTIONS = ("dependencies", "devDependencies", "peerDependencies", "optionalDependencies")
+PACKAGE_JSON_SECTION = re.compile(r'"(?:' + "|".join(PACKAGE_JSON_SECTIONS) + r')"\s*:\s*\{([^{}]*)')
+PACKAGE_JSON_KEY = re.compile(r'"([^"]+)"\s*:')
+REQUIREMENT_NAME = re.compile(r"([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(?:[<>=!~;@,(]|$)")
+TOML_TABLE = re.compile(r"\[\[?\s*([^\]]+?)\s*\]\]?")
+TOML_KEY = re.compile(r"""("[^"]+"|'[^']+'|[A-Za-z0-9_.-]+)\s*=\s*(.*)""")
+QUOTED = re.compile(r""""([^"]*)"|'([^']*)'""")
+GRADLE_BLOCK = re.compile(r"(\w+)\s*(?:\([^()]*\))?\s*$")
+GRADLE_CATALOG_REFERENCE = re.compile(r"\blibs\.([\w.]+)")
+GRADLE_SECTIONS = {"dependencies", "plugins"}
+GEM = re.compile(r"""gem\s*\(?\s*["']([^"']+)["']""")
+
+
+def capped(chunks: Iterable[str], max_bytes: int | None = None) -> Iterator[str]:
+    """Yield ``chunks`` until ``max_bytes`` characters have been seen.
+
+    Manifests are almost always ASCII, so characters stand in for bytes.
+    """
+    remaining = DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+    for chunk in chunks:
+        if remaining <= 0:
+            return
+        yield chunk[:remaining]
+        remaining -= len(chunk)
+
+
+def iter_lines(chunks: Iterable[str], max_bytes: int | None = None) -> Iterator[str]:
+    """Split capped ``chunks`` into lines, holding at most one partial line.
+
+    When the cap cuts a line short, that line is dropped rather than parsed.
+    """
+    remaining = DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+    pending = ""
+    for chunk in chunks:
+        if remaining <= 0:
+            return
+        lines = (pending + chunk[:remaining]).split("\n")
+        remaining -= len(chunk)
+        pending = lines.pop()
+        yield from lines
+    if pending and remaining >= 0:
+        yield pending
+
+
+def strip_comment(line: str, marker: str = "#") -> str:
+    # Only strings and comments matter here, so a marker inside quotes is kept.
+    position = 0
+    while True:
+        index = line.find(marker, position)
+        if index < 0:
+            return line
+        if line.count('"', 0, index) % 2 == 0 and line.count("'", 0, index) % 2 == 0:
+            return line[:index]
+        position = index + 1
+
+
+def quoted_strings(text: str) -> list[str]:
+    return [double or single for double, single in QUOTED.findall(text)]
+
+
+def requirement_name(spec: str) -> str | None:
+    match = REQUIREMENT_NAME.match(spec.strip())
+    return match.group(1) if match else None
+
+
+def parse_package_json(chunks: Iterable[str], max_bytes: int | None = None) -> Iterator[str]:
+    text = "".join(capped(chunks, max_bytes))
+    try:
+        data = json.loads(text)
+    except ValueError:
+        # Truncated by the cap or not quite JSON: read the flat dependency maps directly.
+        for section in PACKAGE_JSON_SECTION.findall(text):
+            yield from PACKAGE_JSON_KEY.findall(section)
+        return
+    if not isinstance(data, dict):
+        return
+    for section in PACKAGE_JSON_SECTIONS:
+        dependencies = data.get(section)
+        if isinstance(dependencies, dict):
+            yield from dependencies
+
+
+def parse_requirements(chunks: Iterable[str], max_bytes: int | None = None) -> Iterator[str]:
+    for line in iter_lines(chunks, max_bytes):
+        line = line.split(" #", 1)[0].strip()
+        if not line or line.startswith(("#", "-")):
+            continue
+        name = requirement_name(line)
+        if name:
+            yield name
+
+
+def parse_toml_dependencies(
+    lines: Iterable[str],
+    name_tables: Callable[[str], bool],
+    array_keys: Callable[[str, str], bool],
+) -> Iterator[str]:
+    """Read dependency names from the tables of a TOML file, line by line.
+
+    Keys of tables accepted by ``name_tables`` are dependency names, as are
+    sub-tables such as ``[dependencies.serde]``. Arrays under keys accepted
+    by ``array_keys`` hold requirement strings like ``"django>=4"``.
+    """
+    table = ""
+    collecting: bool | None = None
+    for raw_line in lines:
+        line = raw_line.strip()
+        if collecting is not None:
+            if collecting:
+                yield from filter(None, map(requirement_name, quoted_strings(line)))
+            if "]" in strip_comment(QUOTED.sub("", line)):
+                collecting = None
+            continue
+        if not line or line.startswith("#"):
+            continue
+        header = TOML_TABLE.match(line) if line.startswith("[") else None
+        if header:
+            table = header.group(1).replace(" ", "")
+            parent, _, name = table.rpartition(".")
+            if parent and name_tables(parent):
+                yield name.strip("\"'")
+            continue
+        match = TOML_KEY.match(line)
+        if not match:
+            continue
+        key, value = match.group(1), strip_comment(match.group(2)).strip()
+        if name_tables(table):
+            yield key[1:-1] if key[0] in "\"'" else key.split(".", 1)[0]
+        if value.startswith("["):
+            wanted = array_keys(table, key.strip("\"'"))
+            if wanted:
+                yield from filter(None, map(requirement_name, quoted_strings(value)))
+            if "]" not in QUOTED.sub("", value):
+                collecting = wanted
+
+
+def is_poetry_dependency_table(table: str) -> bool:
+    parts = table.split(".")
+    return table in ("tool.poetry.dependencies", "tool.poetry.dev-dependencies") or (
+        len(parts) == 5 and parts[:3] == ["tool", "poetry", "group"] and parts[4] == "dependencies"
+    )
+
+
+def is_pyproject_requirement_array(table: str, key: str) -> bool:
+    return (
+        (table == "project" and key == "dependencies")
+        or (table == "build-system" and key == "requires")
+        or table in ("project.optional-dependencies", "dependency-groups", "tool.pdm.dev-dependencies")
+    )
+
+
+def parse_pyproject(chunks: Iterable[str], max_bytes: int | None = None) -> Iterator[str]:
+    names = parse_toml_dependencies(
+        iter_lines(chunks, max_bytes), is_poetry_dependency_table, is_pyproject_requirement_array
+    )
+    return (name for name in names if name.lower() != "python")
+
+
+def is_cargo_dependency_table(table: str) -> bool:
+    return table.rpartition(".")[2] in ("dependencies", "dev-dependencies", "build-dependencies")
+
+
+def parse_cargo_toml(chunks: Iterable[str], max_bytes: int | None = None) -> Iterator[str]:
+    return parse_toml_dependencies(iter_lines(chunks, max_bytes), is_cargo_dependency_table, lambda table, key: False)
+
+
+def parse_go_mod(chunks: Iterable[str], max_bytes: int | None = None) -> Iterator[str]:
+    in_block = False
+    for line in iter_lines(chunks, max_bytes):
+        fields = line.split("//", 1)[0].split()
+        if not fields:
+            continue
+        if in_block:
+            if fields[0] == ")":
+                in_block = False
+            else:
+                yield fields[0]
+        elif fields[0] == "require":
+            if fields[1:2] == ["("]:
+                in_block = True
+            elif len(fields) > 1:
+                yield fields[1]
+
+
+def parse_gradle(chunks: Iterable[str], max_bytes: int | None = None) -> Iterator[str]:
+    """Read plugin ids and ``group:artifact`` coordinates from a Gradle build file.
+
+    Only strings inside ``dependencies`` and ``plugins`` blocks (and ``apply
+    plugin:`` lines) count, so versions, URLs and settings elsewhere do not.
+    """
+    blocks: list[str] = []
+    for line in iter_lines(chunks, max_bytes):
+        line = strip_comment(line, "//").strip()
+        active = line.startswith("apply plugin") or not GRADLE_SECTIONS.isdisjoint(blocks)
+        position = 0
+        for index, char in enumerate(line):
+            if char == "{":
+                block = GRADLE_BLOCK.search(line, position, index)
+                blocks.append(block.group(1) if block else "")
+                position = index + 1
+            elif char == "}" and blocks:
+                blocks.pop()
+                position = index + 1
+            active = active or not GRADLE_SECTIONS.isdisjoint(blocks)
+        if not active:
+            continue
+        for value in quoted_strings(line):
+            yield ":".join(value.split(":")[:2])
+        yield from GRADLE_CATALOG_REFERENCE.findall(line)
+
+
+def parse_gemfile(chunks: Iterable[str], max_bytes: int | None = None) -> Iterator[str]:
+    for line in iter_lines(chunks, max_bytes):
+        match = GEM.match(line.strip())
+        if match:
+            yield match.group(1)
+
+
+PARSERS: dict[str, Callable[[Iterable[str], int | None], Iterator[str]]] = {
+    "package.json": parse_package_json,
+    "requirements.txt": parse_requirements,
+    "pyproject.toml": parse_pyproject,
+    "Cargo.toml": parse_cargo_toml,
+    "go.mod": parse_go_mod,
+    "build.gradle": parse_gradle,
+    "build.gradle.kts": parse_gradle,
+    "Gemfile": parse_gemfile,
+}
+
+
+def parser_for(path: str) -> Callable[[Iterable[str], int | None], Iterator[str]] | None:
+    filename = path.rsplit("/", 1)[-1]
+    if filename.startswith("requirements") and filename.endswith(".txt"):
+        return parse_requirements
+    return PARSERS.get(filename)
+
+
+def dependency_names(path: str, chunks: Iterable[str], max_bytes: int | None = None) -> set[str] | None:
+    """Return the lowercased dependency names declared in a manifest.
+
+    Returns None when ``path`` has no structured parser. At most
+    ``max_bytes`` of the input is read (``MANIFEST_MAX_BYTES`` by default).
+    """
+    parser = parser_for(path)
+    if parser is None:
+        return None
+    return {name.lower() for name in parser(chunks, max_bytes)}
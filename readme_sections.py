@@ -0,0 +1,81 @@
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from typing import Callable
+
+SECTION_PATTERN = re.compile(r"<!--START_SECTION:(?P<name>[\w.-]+)-->(?P<body>.*?)<!--END_SECTION:(?P=name)-->", re.S)
+
+
+@dataclass(frozen=True)
+class SectionSpan:
+    name: str
+    start: int
+    end: int
+    body_start: int
+    body_end: int
+
+
+def start_marker(name: str) -> str:
+    return f"<!--START_SECTION:{name}-->"
+
+
+def end_marker(name: str) -> str:
+    return f"<!--END_SECTION:{name}-->"
+
+
+def parse_sections(content: str) -> list[SectionSpan]:
+    return [
+        SectionSpan(match["name"], match.start(), match.end(), match.start("body"), match.end("body"))
+        for match in SECTION_PATTERN.finditer(content)
+    ]
+
+
+def replace_sections(content: str, bodies: dict[str, str], spans: list[SectionSpan] | None = None) -> str:
+    """Swap the body of every section named in ``bodies`` in a single pass.
+
+    Markers and everything outside them are kept as is; sections missing from
+    ``content`` are ignored.
+    """
+    spans = parse_sections(content) if spans is None else spans
+    pieces = []
+    position = 0
+    for span in spans:
+        if span.name in bodies:
+            pieces.append(content[position : span.body_start])
+            pieces.append(bodies[span.name])
+            position = span.body_end
+    pieces.append(content[position:])
+    return "".join(pieces)
+
+
+def content_digest(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def write_if_changed(path: str, original: str, updated: str) -> bool:
+    if content_digest(updated) == content_digest(original):
+        return False
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(updated)
+    os.replace(temp_path, path)
+    return True
+
+
+def update_file(
+    path: str,
+    bodies: dict[str, str] | None = None,
+    edit: Callable[[str, list[SectionSpan]], str] | None = None,
+) -> bool:
+    """Apply section updates to ``path`` and report whether it was rewritten.
+
+    The file is read and its markers parsed once; ``edit`` receives the
+    content and spans for updates that are more than a body swap. The file is
+    only replaced, atomically, when the result differs.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        content = file.read()
+    spans = parse_sections(content)
+    updated = edit(content, spans) if edit else replace_sections(content, bodies or {}, spans)
+    return write_if_changed(path, content, updated)
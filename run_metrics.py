@@ -0,0 +1,98 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+DEFAULT_METRICS_PATH = os.getenv("RUN_METRICS_PATH", os.path.join(".cache", "run_metrics.jsonl"))
+
+
+class RunMetrics:
+    """Per-process span timings and counters for one script run.
+
+    Spans aggregate by name (count, total and max seconds), so the same
+    phase running in many worker threads shows up as one line.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = datetime.now(timezone.utc)
+            self._started = self.clock()
+            self.spans: dict[str, dict[str, float]] = {}
+            self.counters: dict[str, int] = {}
+
+    def record(self, name: str, seconds: float, failed: bool = False) -> None:
+        with self._lock:
+            span = self.spans.setdefault(name, {"count": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            span["count"] += 1
+            span["errors"] += int(failed)
+            span["total_seconds"] += seconds
+            span["max_seconds"] = max(span["max_seconds"], seconds)
+
+    @contextmanager
+    def span(self, name: str):
+        start = self.clock()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.record(name, self.clock() - start, failed)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self, script: str) -> dict:
+        with self._lock:
+            return {
+                "script": script,
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "duration_seconds": round(self.clock() - self._started, 3),
+                "spans": {
+                    name: {**span, "total_seconds": round(span["total_seconds"], 3), "max_seconds": round(span["max_seconds"], 3)}
+                    for name, span in sorted(self.spans.items())
+                },
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+
+metrics = RunMetrics()
+
+
+def timed(name: str | None = None):
+    def decorator(function):
+        span_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with metrics.span(span_name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def emit(script: str, path: str | None = None) -> dict:
+    summary = metrics.summary(script)
+    print(f"Run metrics: {json.dumps(summary)}")
+    path = path or DEFAULT_METRICS_PATH
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(summary) + "\n")
+    except OSError as err:
+        print(f"Could not write run metrics to {path}: {err}")
+    return summary
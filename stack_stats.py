@@ -0,0 +1,133 @@
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable
+
+
+@dataclass(frozen=True)
+class RankingPolicy:
+    """How per-repo results are combined into one ranking.
+
+    ``weighting`` is ``"count"`` (every repo counts once) or ``"recency"``
+    (a repo's weight halves every ``half_life_days`` before the most recent
+    push). ``normalize_bytes`` makes each repo contribute its language
+    shares instead of raw bytes, so one huge repo cannot dominate.
+    """
+
+    weighting: str = "count"
+    half_life_days: float = 180.0
+    normalize_bytes: bool = False
+    exclude_archived: bool = False
+
+
+def parse_timestamp(value: str | None) -> float:
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+class StackStats:
+    """Column-oriented per-repo languages, tools and metadata.
+
+    Each column is a typed ``array`` with one slot per repo: language bytes
+    and sizes as 64-bit ints, push times as doubles, tool and archived flags
+    as bytes. Ranking ties break by first appearance among the selected
+    rows, the same way ``Counter.most_common`` does over those rows.
+    """
+
+    def __init__(self):
+        self.keys: list[str] = []
+        self.pushed_at = array("d")
+        self.size = array("q")
+        self.archived = array("B")
+        self.language_bytes: dict[str, array] = {}
+        self.tool_flags: dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: str, languages: Counter, tools: Iterable[str], repo: dict) -> int:
+        row = len(self.keys)
+        self.keys.append(key)
+        self.pushed_at.append(parse_timestamp(repo.get("pushed_at")))
+        self.size.append(int(repo.get("size") or 0))
+        self.archived.append(1 if repo.get("archived") else 0)
+        for column in self.language_bytes.values():
+            column.append(0)
+        for column in self.tool_flags.values():
+            column.append(0)
+        for language, size in languages.items():
+            if language not in self.language_bytes:
+                self.language_bytes[language] = array("q", bytes(8 * (row + 1)))
+            self.language_bytes[language][row] = int(size)
+        # Sorted so column order does not depend on set hashing.
+        for tool in sorted(tools):
+            if tool not in self.tool_flags:
+                self.tool_flags[tool] = array("B", bytes(row + 1))
+            self.tool_flags[tool][row] = 1
+        return row
+
+    def row_weights(self, policy: RankingPolicy, rows: Iterable[int] | None = None) -> array:
+        selected = array("B", bytes(len(self))) if rows is not None else array("B", b"\x01" * len(self))
+        for row in rows or ():
+            selected[row] = 1
+        if policy.exclude_archived:
+            selected = array("B", (keep and not archived for keep, archived in zip(selected, self.archived)))
+        if policy.weighting == "recency":
+            latest = max((pushed for pushed, keep in zip(self.pushed_at, selected) if keep), default=0.0)
+            half_life = policy.half_life_days * 86_400
+            return array(
+                "d", (keep * 0.5 ** ((latest - pushed) / half_life) for pushed, keep in zip(self.pushed_at, selected))
+            )
+        if policy.weighting != "count":
+            raise ValueError(f"unknown ranking weighting: {policy.weighting}")
+        return array("d", selected)
+
+    def language_scores(self, weights: array, normalize_bytes: bool = False) -> dict[str, float]:
+        if normalize_bytes:
+            totals = [0] * len(self)
+            for column in self.language_bytes.values():
+                totals = [total + size for total, size in zip(totals, column)]
+            weights = array("d", (weight / total if total else 0.0 for weight, total in zip(weights, totals)))
+        return in_appearance_order(
+            weights,
+            {
+                language: (sum(weight * size for weight, size in zip(weights, column)), column)
+                for language, column in self.language_bytes.items()
+            },
+        )
+
+    def tool_scores(self, weights: array) -> dict[str, float]:
+        return in_appearance_order(
+            weights,
+            {
+                tool: (sum(weight for weight, flag in zip(weights, column) if flag), column)
+                for tool, column in self.tool_flags.items()
+            },
+        )
+
+    def rank(
+        self, policy: RankingPolicy = RankingPolicy(), rows: Iterable[int] | None = None
+    ) -> tuple[list[str], list[str]]:
+        """Return languages and tools ordered by score for ``rows`` (all rows by default)."""
+        weights = self.row_weights(policy, rows)
+        languages = self.language_scores(weights, policy.normalize_bytes)
+        tools = self.tool_scores(weights)
+        return ranked(languages), ranked(tools)
+
+
+def in_appearance_order(weights: array, scored: dict[str, tuple[float, array]]) -> dict[str, float]:
+    def first_row(column: array) -> int:
+        return next((row for row, (weight, value) in enumerate(zip(weights, column)) if weight and value), len(column))
+
+    order = sorted(scored, key=lambda name: first_row(scored[name][1]))
+    return {name: scored[name][0] for name in order}
+
+
+def ranked(scores: dict[str, float]) -> list[str]:
+    # sorted() is stable, so equal scores keep column order like most_common().
+    return [name for name, score in sorted(scores.items(), key=lambda item: item[1], reverse=True) if score > 0]
@@ -0,0 +1,312 @@
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import queue
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import blob_store
+import generate_stack_section as stack
+import http_client
+import run_metrics
+import update_readme
+
+WATCH_HOST = os.getenv("WATCH_HOST", "127.0.0.1")
+WATCH_PORT = int(os.getenv("WATCH_PORT", "8787"))
+WEBHOOK_SECRET = os.getenv("WATCH_WEBHOOK_SECRET", "")
+DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE_SECONDS", "2"))
+# ``repository`` webhook actions that can change what a repo contributes.
+REPO_ACTIONS = {"created", "publicized", "privatized", "renamed", "edited", "archived", "unarchived", "transferred"}
+
+
+@dataclass(frozen=True)
+class Event:
+    kind: str
+    full_name: str | None = None
+    repo_id: int | None = None
+
+
+def parse_event(name: str, payload: dict) -> Event | None:
+    """Turn a webhook delivery into an ``Event``, or None when it changes nothing we render.
+
+    ``push`` and most ``repository`` actions become ``"repo"`` events,
+    repository deletion becomes ``"deleted"``, and deliveries to the
+    heartbeat endpoint become ``"heartbeat"``.
+    """
+    if name == "heartbeat":
+        return Event("heartbeat")
+    repository = payload.get("repository") or {}
+    full_name = repository.get("full_name")
+    if not full_name:
+        return None
+    if name == "push" or (name == "repository" and payload.get("action") in REPO_ACTIONS):
+        return Event("repo", full_name, repository.get("id"))
+    if name == "repository" and payload.get("action") == "deleted":
+        return Event("deleted", full_name, repository.get("id"))
+    return None
+
+
+class StackWatcher:
+    """Warm state for watch mode: listings, snapshots and per-repo results.
+
+    Everything a cron run rebuilds from disk stays in memory between events,
+    along with the pooled HTTP session, caches, blob store and hint matchers
+    of the imported modules. An event costs only the requests for the repos
+    it names, and only the README sections of the affected owners are
+    rewritten.
+    """
+
+    def __init__(
+        self,
+        targets: list[tuple[str, str]],
+        projects_readme: str | None = None,
+        ranking: str | None = None,
+        snapshot_path: str | None = None,
+        workers: int | None = None,
+        backend: str | None = None,
+    ):
+        self.targets: dict[str, list[str]] = {}
+        for username, readme_path in targets:
+            self.targets.setdefault(username, []).append(readme_path)
+        self.projects_readme = projects_readme
+        self.ranking = ranking
+        self.snapshot_path = snapshot_path or stack.DEFAULT_SNAPSHOT_PATH
+        self.workers = workers if workers is not None else stack.DEFAULT_SCAN_WORKERS
+        self.backend = backend or stack.DEFAULT_SCAN_BACKEND
+        self.headers = stack.build_headers()
+        self.listings: dict[str, dict[str, dict]] = {}
+        self.snapshots: dict[str, dict] = {}
+        self.stacks: dict[str, tuple[Counter, set[str]]] = {}
+
+    def start(self) -> None:
+        """Scan every target once, as a scheduled run would, and keep the results."""
+        listings = stack.fetch_listings(list(self.targets), self.headers)
+        self.listings = {
+            username: {stack.snapshot_key(repo): repo for repo in listing} for username, listing in listings.items()
+        }
+        previous_snapshots, redetected, _ = stack.redetect_snapshots(
+            stack.load_snapshots(self.snapshot_path), blob_store.get_store()
+        )
+        if redetected:
+            print(f"Re-detected {redetected} repositories offline with the current hint tables")
+        repos = list({key: repo for listing in self.listings.values() for key, repo in listing.items()}.values())
+        self.stacks, self.snapshots = stack.scan_stacks(
+            repos, self.headers, previous_snapshots, self.workers, self.backend, ", ".join(self.targets)
+        )
+        self.save_snapshots()
+        for username in self.targets:
+            self.write_stack(username)
+        if self.projects_readme:
+            self.refresh_projects()
+
+    def owner(self, full_name: str) -> str | None:
+        login = full_name.split("/", 1)[0].lower()
+        return next((username for username in self.targets if username.lower() == login), None)
+
+    def handle(self, events: list[Event]) -> None:
+        """Apply a batch of events; repeated events for one repo are handled once."""
+        changed: dict[str, str] = {}
+        affected: set[str] = set()
+        heartbeat = False
+        for event in events:
+            if event.kind == "heartbeat":
+                heartbeat = True
+                continue
+            username = self.owner(event.full_name)
+            if username is None:
+                print(f"Ignoring event for {event.full_name}: not a watched account")
+                continue
+            if event.kind == "deleted":
+                key = str(event.repo_id) if event.repo_id is not None else event.full_name
+                self.listings[username].pop(key, None)
+                self.stacks.pop(key, None)
+                self.snapshots.pop(key, None)
+                changed.pop(event.full_name, None)
+                affected.add(username)
+                continue
+            changed[event.full_name] = username
+
+        repos = []
+        for full_name, username in changed.items():
+            try:
+                repo = stack.fetch_json(f"{stack.GITHUB_API_URL}/repos/{full_name}", self.headers)
+            except requests.RequestException as err:
+                print(f"Could not fetch {full_name}: {err}")
+                continue
+            if repo.get("fork"):
+                continue
+            key = stack.snapshot_key(repo)
+            # The listing is sorted by last update, so a changed repo moves to the front.
+            listing = self.listings[username]
+            self.listings[username] = {key: repo, **{other: item for other, item in listing.items() if other != key}}
+            repos.append(repo)
+            affected.add(username)
+
+        if repos:
+            stacks, snapshots = stack.scan_stacks(
+                repos, self.headers, self.snapshots, self.workers, self.backend, ", ".join(sorted(affected))
+            )
+            self.stacks.update(stacks)
+            for repo in repos:
+                key = stack.snapshot_key(repo)
+                if key in snapshots:
+                    self.snapshots[key] = snapshots[key]
+                else:
+                    # Incomplete scans are not checkpointed, so the next event or run retries them.
+                    self.snapshots.pop(key, None)
+        if affected:
+            self.save_snapshots()
+            for username in sorted(affected):
+                self.write_stack(username)
+        if heartbeat and self.projects_readme:
+            self.refresh_projects()
+
+    def save_snapshots(self) -> None:
+        owners = {username: list(listing) for username, listing in self.listings.items()}
+        stack.save_snapshots(self.snapshot_path, self.snapshots, owners)
+
+    def write_stack(self, username: str) -> None:
+        listing = self.listings.get(username, {})
+        if any(key not in self.stacks for key in listing):
+            print(f"Keeping {username}'s stack section until its deferred repositories are scanned")
+            return
+        stats = stack.build_stack_stats((repo, *self.stacks[key]) for key, repo in listing.items())
+        languages, tools = stack.rank_stack(stats, self.ranking)
+        stack.print_stack(f"{username}: ", languages, tools)
+        for readme_path in self.targets[username]:
+            stack.write_stack_section(readme_path, languages, tools)
+
+    def refresh_projects(self) -> None:
+        update_readme.update_readme(update_readme.fetch_most_recent_projects(), self.projects_readme)
+
+
+def run_events(
+    watcher: StackWatcher,
+    events: queue.Queue,
+    stop: threading.Event,
+    debounce: float = DEBOUNCE_SECONDS,
+) -> None:
+    """Handle queued events until ``stop`` is set.
+
+    Events arriving within ``debounce`` seconds of each other are handled as
+    one batch, so a burst of pushes costs one README write.
+    """
+    while not stop.is_set():
+        try:
+            batch = [events.get(timeout=0.2)]
+        except queue.Empty:
+            continue
+        while True:
+            try:
+                batch.append(events.get(timeout=debounce))
+            except queue.Empty:
+                break
+        try:
+            watcher.handle(batch)
+        except (requests.RequestException, http_client.RateLimitExhausted, OSError) as err:
+            print(f"Could not handle {len(batch)} events: {err}")
+        finally:
+            for _ in batch:
+                events.task_done()
+
+
+def verify_signature(secret: str, body: bytes, signature: str | None) -> bool:
+    if not secret:
+        return True
+    expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return signature is not None and hmac.compare_digest(expected, signature)
+
+
+def build_server(
+    events: queue.Queue, host: str = WATCH_HOST, port: int = WATCH_PORT, secret: str = WEBHOOK_SECRET
+) -> ThreadingHTTPServer:
+    """Receive GitHub webhooks on ``/github`` and heartbeat notices on ``/heartbeat``.
+
+    Deliveries are queued and acknowledged right away; with ``secret`` set,
+    they must carry a matching ``X-Hub-Signature-256``.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def respond(self, status: int) -> None:
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            path = self.path.split("?", 1)[0].rstrip("/")
+            if path not in ("/github", "/heartbeat"):
+                return self.respond(404)
+            if not verify_signature(secret, body, self.headers.get("X-Hub-Signature-256")):
+                return self.respond(401)
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                return self.respond(400)
+            name = "heartbeat" if path == "/heartbeat" else self.headers.get("X-GitHub-Event", "")
+            event = parse_event(name, payload if isinstance(payload, dict) else {})
+            if event is not None:
+                events.put(event)
+            self.respond(202 if event is not None else 204)
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def watch(
+    targets: list[tuple[str, str]],
+    projects_readme: str | None = None,
+    ranking: str | None = None,
+    host: str = WATCH_HOST,
+    port: int = WATCH_PORT,
+    stop: threading.Event | None = None,
+) -> None:
+    watcher = StackWatcher(targets, projects_readme, ranking)
+    watcher.start()
+    events: queue.Queue = queue.Queue()
+    stop = stop or threading.Event()
+    server = build_server(events, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Watching for events on http://{host}:{server.server_address[1]}")
+    try:
+        run_events(watcher, events, stop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+        stack.report_caches()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Keep profile README sections current from webhook events.")
+    parser.add_argument("targets", nargs="*", type=stack.parse_target, metavar="USERNAME=README_PATH")
+    parser.add_argument("--targets-file", help="file with one USERNAME=README_PATH per line")
+    parser.add_argument("--projects-readme", help="README whose Current Focus section follows heartbeat events")
+    parser.add_argument("--ranking", choices=sorted(stack.RANKING_POLICIES), help="how repos are weighted when ranking")
+    parser.add_argument("--host", default=WATCH_HOST)
+    parser.add_argument("--port", type=int, default=WATCH_PORT)
+    args = parser.parse_args(argv)
+
+    targets = list(args.targets)
+    if args.targets_file:
+        try:
+            targets.extend(stack.read_targets(args.targets_file))
+        except (OSError, argparse.ArgumentTypeError) as err:
+            parser.error(str(err))
+    if not targets:
+        targets = [(os.getenv("GITHUB_USERNAME") or "FahadBinHussain", "README.md")]
+    watch(targets, args.projects_readme, args.ranking, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
+    run_metrics.emit("stack_watch")
@@ -0,0 +1,172 @@
+"""Benchmark ``update_readme_stack`` against the local fake GitHub server.
+
+Each run happens in a fresh interpreter so wall time and peak RSS belong to
+the scanner alone; request and byte counts come from the server. A cold run
+(empty caches) is followed by a warm run reusing the same cache directory.
+
+    python tests/benchmark_stack.py --scenario 1000
+    python tests/benchmark_stack.py --repos 300 --tree-size 2000 --latency 0.05
+    python tests/benchmark_stack.py --update-baselines
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from fake_github import FakeGitHub, SyntheticAccount
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINES_PATH = Path(__file__).with_name("benchmark_baselines.json")
+SCENARIOS = {
+    "10": {"repo_count": 10, "tree_size": 50},
+    "100": {"repo_count": 100, "tree_size": 200},
+    "1000": {"repo_count": 1000, "tree_size": 200},
+}
+# Request and byte counts are deterministic; timings and memory are not.
+TOLERANCES = {"requests": 1.0, "bytes": 1.05, "wall_seconds": 3.0, "peak_rss_kb": 1.5}
+# Sub-second runs are dominated by scheduler noise, so timings also get an
+# absolute allowance before they count as a regression.
+WALL_SLACK_SECONDS = 1.0
+
+# ru_maxrss survives exec on Linux and would report the (larger) parent, so
+# prefer the per-address-space high-water mark when /proc has it.
+CHILD_SCRIPT = """
+import json, re, resource, sys, time
+sys.path.insert(0, sys.argv[1])
+import generate_stack_section
+start = time.perf_counter()
+generate_stack_section.update_readme_stack(sys.argv[2], sys.argv[3])
+wall = time.perf_counter() - start
+try:
+    with open("/proc/self/status") as status:
+        peak_rss_kb = int(re.search(r"VmHWM:\\s+(\\d+)", status.read()).group(1))
+except (OSError, AttributeError):
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+with open(sys.argv[4], "w") as file:
+    json.dump({"wall_seconds": wall, "peak_rss_kb": peak_rss_kb}, file)
+"""
+
+README_TEMPLATE = """# Bench
+<!--START_SECTION:stack-->
+<!--END_SECTION:stack-->
+"""
+
+
+def run_stack_update(server: FakeGitHub, workdir: Path, username: str, extra_env: dict | None = None) -> dict:
+    readme_path = workdir / "README.md"
+    readme_path.write_text(README_TEMPLATE, encoding="utf-8")
+    metrics_path = workdir / "metrics.json"
+    cache_dir = workdir / "cache"
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if key not in {"PAT_1", "GITHUB_TOKEN1", "METRICS_TOKEN", "STACK_FULL_SCAN", "STACK_FORCE"}
+    }
+    env.update(
+        {
+            "GITHUB_API_URL": server.url,
+            "GITHUB_TOKEN": "bench-token",
+            "HTTP_CACHE_PATH": str(cache_dir / "http_cache.sqlite3"),
+            "STACK_SNAPSHOT_PATH": str(cache_dir / "stack_snapshots.json"),
+            "BLOB_STORE_PATH": str(cache_dir / "blobs.sqlite3"),
+            "STACK_PREFLIGHT_PATH": str(cache_dir / "stack_preflight.json"),
+        }
+    )
+    env.update(extra_env or {})
+    server.reset_counters()
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, str(ROOT), str(readme_path), username, str(metrics_path)],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"benchmark run failed:\n{completed.stdout}\n{completed.stderr}")
+    result = json.loads(metrics_path.read_text())
+    result.update(server.metrics())
+    result["stdout"] = completed.stdout
+    result["readme"] = readme_path.read_text(encoding="utf-8")
+    return result
+
+
+def run_benchmark(
+    repo_count: int,
+    tree_size: int,
+    latency: float = 0.0,
+    rate_limit: int = 5_000,
+    extra_env: dict | None = None,
+) -> dict:
+    account = SyntheticAccount(repo_count=repo_count, tree_size=tree_size)
+    with FakeGitHub(account, latency=latency, rate_limit=rate_limit) as server, tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        cold = run_stack_update(server, workdir, account.username, extra_env)
+        warm = run_stack_update(server, workdir, account.username, extra_env)
+    return {"cold": cold, "warm": warm}
+
+
+def report(results: dict) -> dict:
+    return {
+        run: {
+            "wall_seconds": round(results[run]["wall_seconds"], 3),
+            **{metric: results[run][metric] for metric in ("requests", "not_modified", "bytes", "peak_rss_kb")},
+        }
+        for run in ("cold", "warm")
+    }
+
+
+def load_baselines() -> dict:
+    if not BASELINES_PATH.exists():
+        return {}
+    return json.loads(BASELINES_PATH.read_text())
+
+
+def find_regressions(results: dict, baseline: dict) -> list[str]:
+    regressions = []
+    for run, metrics in report(results).items():
+        for metric, tolerance in TOLERANCES.items():
+            expected = baseline.get(run, {}).get(metric)
+            if expected is None:
+                continue
+            allowed = expected * tolerance
+            if metric == "wall_seconds":
+                allowed = max(allowed, expected + WALL_SLACK_SECONDS)
+            if metrics[metric] > allowed:
+                regressions.append(f"{run} {metric}: {metrics[metric]} > allowed {allowed:g}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), help="run a stored scenario and compare to its baseline")
+    parser.add_argument("--repos", type=int, default=100)
+    parser.add_argument("--tree-size", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--rate-limit", type=int, default=5_000)
+    parser.add_argument("--update-baselines", action="store_true", help="rerun every scenario and store the results")
+    args = parser.parse_args()
+
+    if args.update_baselines:
+        baselines = {name: report(run_benchmark(**scenario)) for name, scenario in SCENARIOS.items()}
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=2) + "\n")
+        print(json.dumps(baselines, indent=2))
+        return 0
+
+    if args.scenario:
+        results = run_benchmark(**SCENARIOS[args.scenario])
+        regressions = find_regressions(results, load_baselines().get(args.scenario, {}))
+    else:
+        results = run_benchmark(args.repos, args.tree_size, args.latency, args.rate_limit)
+        regressions = []
+    print(json.dumps(report(results), indent=2))
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""A small in-process stand-in for the parts of the GitHub REST API we use.
+
+It serves a synthetic account with a configurable number of repositories,
+tree sizes, latency and rate limit, honours ``If-None-Match`` and the raw
+media type for file contents, and counts the requests and bytes it sends,
+so scans can be benchmarked without the network.
+"""
+
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+MANIFEST_TEMPLATES = {
+    "package.json": [
+        '{"dependencies": {"react": "^18.2.0", "next": "^14.0.0", "tailwindcss": "^3.4.0"}}',
+        '{"dependencies": {"express": "^4.18.0", "mongoose": "^8.0.0", "axios": "^1.6.0"}}',
+        '{"devDependencies": {"vite": "^5.0.0", "vitest": "^1.0.0", "eslint": "^8.0.0"}}',
+    ],
+    "requirements.txt": [
+        "flask\nrequests\nredis\n",
+        "fastapi\nuvicorn\nsqlalchemy\npsycopg2 # postgres\n",
+        "pandas\nnumpy\nscikit-learn\n",
+    ],
+    "Cargo.toml": ['[package]\nname = "app"\n[dependencies]\ntauri = "1"\n'],
+    "_config.yml": ["theme: jekyll-theme-minimal\n"],
+}
+EXTRA_FILES = ["Dockerfile", ".github/workflows/ci.yml", "vercel.json", "go.mod", "manage.py"]
+LANGUAGE_POOL = ["Python", "JavaScript", "TypeScript", "HTML", "CSS", "Rust", "Go", "Shell"]
+
+
+def blob_sha(text: str) -> str:
+    data = text.encode()
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class SyntheticAccount:
+    def __init__(self, username: str = "bench-user", repo_count: int = 10, tree_size: int = 50, seed: int = 0):
+        self.username = username
+        rng = random.Random(seed)
+        self.repos = []
+        self.languages = {}
+        self.trees = {}
+        self.blobs = {}
+        for index in range(repo_count):
+            name = f"project-{index:04d}"
+            full_name = f"{username}/{name}"
+            files = {}
+            for manifest, templates in MANIFEST_TEMPLATES.items():
+                if rng.random() < 0.5:
+                    files[manifest] = rng.choice(templates)
+            for extra in EXTRA_FILES:
+                if rng.random() < 0.3:
+                    files[extra] = f"# {extra}\n"
+            for file_index in range(max(tree_size - len(files), 0)):
+                files[f"src/module_{file_index // 50}/file_{file_index}.{rng.choice(['py', 'js', 'ts', 'md'])}"] = ""
+            self.set_files(full_name, files)
+            self.languages[full_name] = {
+                language: rng.randint(1_000, 500_000) for language in rng.sample(LANGUAGE_POOL, rng.randint(1, 4))
+            }
+            self.repos.append(
+                {
+                    "id": 1_000 + index,
+                    "name": name,
+                    "full_name": full_name,
+                    "fork": False,
+                    "owner": {"login": username},
+                    "default_branch": "main",
+                    "pushed_at": f"2026-01-{index % 28 + 1:02d}T00:00:00Z",
+                    "size": len(files),
+                    "archived": False,
+                }
+            )
+
+    def set_files(self, full_name: str, files: dict[str, str]) -> None:
+        entries = []
+        for path, text in files.items():
+            sha = blob_sha(text)
+            self.blobs[sha] = text
+            entries.append({"path": path, "mode": "100644", "type": "blob", "sha": sha, "size": len(text)})
+        tree_sha = hashlib.sha1(json.dumps(entries).encode()).hexdigest()
+        self.trees[full_name] = {"sha": tree_sha, "tree": entries, "truncated": False, "files": files}
+
+    def repo(self, full_name: str) -> dict:
+        return next(repo for repo in self.repos if repo["full_name"] == full_name)
+
+    def push(self, full_name: str, files: dict[str, str], pushed_at: str) -> dict:
+        """Replace files in a repo, as a push would, and return the updated repo."""
+        self.set_files(full_name, {**self.trees[full_name]["files"], **files})
+        repo = self.repo(full_name)
+        repo["pushed_at"] = pushed_at
+        return repo
+
+    def create(self, name: str, files: dict[str, str], languages: dict[str, int], pushed_at: str) -> dict:
+        full_name = f"{self.username}/{name}"
+        self.set_files(full_name, files)
+        self.languages[full_name] = languages
+        repo = {
+            "id": 1_000 + len(self.repos),
+            "name": name,
+            "full_name": full_name,
+            "fork": False,
+            "owner": {"login": self.username},
+            "default_branch": "main",
+            "pushed_at": pushed_at,
+            "size": len(files),
+            "archived": False,
+        }
+        self.repos.insert(0, repo)
+        return repo
+
+
+class FakeGitHub:
+    def __init__(
+        self,
+        account: SyntheticAccount,
+        latency: float = 0.0,
+        rate_limit: int = 5_000,
+        rate_limit_reset: float = 3_600,
+    ):
+        self.account = account
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.remaining = rate_limit
+        self.reset_at = int(time.time() + rate_limit_reset)
+        self.request_count = 0
+        self.not_modified_count = 0
+        self.bytes_sent = 0
+        self.paths: list[str] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.request_count = 0
+            self.not_modified_count = 0
+            self.bytes_sent = 0
+            self.paths = []
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.request_count,
+                "not_modified": self.not_modified_count,
+                "bytes": self.bytes_sent,
+            }
+
+    def public_repo(self, repo: dict) -> dict:
+        return {**repo, "languages_url": f"{self.url}/repos/{repo['full_name']}/languages"}
+
+    def route(self, path: str, query: dict[str, list[str]], raw: bool = False):
+        account = self.account
+        parts = [part for part in path.split("/") if part]
+        if parts in (["user", "repos"], ["users", account.username, "repos"]):
+            page = int(query.get("page", ["1"])[0])
+            per_page = int(query.get("per_page", ["30"])[0])
+            return 200, [self.public_repo(repo) for repo in account.repos[(page - 1) * per_page : page * per_page]]
+        if len(parts) >= 3 and parts[0] == "repos":
+            full_name = f"{parts[1]}/{parts[2]}"
+            if full_name not in account.trees:
+                return 404, {"message": "Not Found"}
+            if len(parts) == 3:
+                return 200, self.public_repo(account.repo(full_name))
+            tree = account.trees[full_name]
+            if parts[3:] == ["languages"]:
+                return 200, account.languages[full_name]
+            if parts[3:5] == ["git", "trees"]:
+                if not tree["tree"]:
+                    return 409, {"message": "Git Repository is empty."}
+                return 200, {"sha": tree["sha"], "url": self.url + path, "tree": tree["tree"], "truncated": False}
+            if parts[3:5] == ["git", "blobs"] and len(parts) == 6:
+                text = account.blobs.get(parts[5])
+                if text is None:
+                    return 404, {"message": "Not Found"}
+                if raw:
+                    return 200, text.encode()
+                return 200, {"sha": parts[5], "encoding": "base64", "content": base64.b64encode(text.encode()).decode()}
+            if parts[3] == "contents":
+                text = tree["files"].get("/".join(parts[4:]))
+                if text is None:
+                    return 404, {"message": "Not Found"}
+                if raw:
+                    return 200, text.encode()
+                return 200, {"encoding": "base64", "content": base64.b64encode(text.encode()).decode()}
+        return 404, {"message": "Not Found"}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                parts = urlsplit(self.path)
+                with fake._lock:
+                    fake.request_count += 1
+                    fake.paths.append(parts.path)
+                    if fake.remaining <= 0:
+                        status, payload = 403, {"message": "API rate limit exceeded"}
+                    else:
+                        raw = "raw" in self.headers.get("Accept", "")
+                        status, payload = fake.route(parts.path, parse_qs(parts.query), raw)
+                    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                    if status == 200 and self.headers.get("If-None-Match") == etag:
+                        # Conditional hits do not count against GitHub's budget.
+                        status, body = 304, b""
+                        fake.not_modified_count += 1
+                    elif status != 403:
+                        fake.remaining -= 1
+                    remaining = fake.remaining
+                    fake.bytes_sent += len(body)
+                self.send_response(status)
+                content_type = "application/vnd.github.raw" if isinstance(payload, bytes) else "application/json"
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.send_header("X-RateLimit-Limit", str(fake.rate_limit))
+                self.send_header("X-RateLimit-Remaining", str(max(remaining, 0)))
+                self.send_header("X-RateLimit-Reset", str(fake.reset_at))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Clients may stop reading a streamed body once they have enough.
+                    self.close_connection = True
+
+        return Handler
@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+from benchmark_stack import SCENARIOS, find_regressions, load_baselines, run_benchmark
+
+FAST_SCENARIOS = ["10", "100"]
+FULL_SCENARIOS = ["1000"] if os.getenv("STACK_BENCH_FULL") == "1" else []
+
+
+@pytest.mark.parametrize("scenario", FAST_SCENARIOS + FULL_SCENARIOS)
+def test_stack_scan_stays_within_baseline(scenario):
+    baseline = load_baselines()[scenario]
+
+    results = run_benchmark(**SCENARIOS[scenario])
+
+    assert find_regressions(results, baseline) == []
+    assert "<!--START_SECTION:stack-->" in results["cold"]["readme"]
+    assert results["warm"]["readme"] == results["cold"]["readme"]
+
+
+def test_stack_scan_resumes_deferred_repositories_under_a_small_rate_limit():
+    import re
+
+    results = run_benchmark(repo_count=10, tree_size=20, rate_limit=80)
+
+    deferred = [
+        int(match.group(1)) if match else 0
+        for match in (re.search(r"Deferring (\d+) repositories", results[run]["stdout"]) for run in ("cold", "warm"))
+    ]
+    assert deferred[0] > deferred[1]
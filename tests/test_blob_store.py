@@ -0,0 +1,95 @@
+import threading
+import time
+
+from blob_store import BlobStore, PartialText, pack_paths
+
+
+def test_blob_is_fetched_and_scanned_once(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs.sqlite3"))
+    fetches = []
+    detections = []
+
+    def fetch():
+        fetches.append(1)
+        return '{"dependencies": {"react": "18"}}'
+
+    def detect(text):
+        detections.append(text)
+        return {"React"}
+
+    assert store.tools_for("abc", "v1", fetch, detect) == {"React"}
+    assert store.tools_for("abc", "v1", fetch, detect) == {"React"}
+
+    reopened = BlobStore(str(tmp_path / "blobs.sqlite3"))
+    assert reopened.tools_for("abc", "v1", fetch, detect) == {"React"}
+    assert len(fetches) == 1
+    assert len(detections) == 1
+
+
+def test_new_hint_version_rescans_without_refetching(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs.sqlite3"))
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return "flask\nredis"
+
+    store.tools_for("abc", "v1", fetch, lambda text: {"Flask"})
+    tools = store.tools_for("abc", "v2", fetch, lambda text: {"Flask", "Redis"})
+
+    assert tools == {"Flask", "Redis"}
+    assert len(fetches) == 1
+    assert store.stats == {"hits": 0, "fetched": 1, "detected": 2}
+
+
+def test_concurrent_requests_share_one_fetch(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs.sqlite3"))
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        time.sleep(0.05)
+        return "django"
+
+    threads = [
+        threading.Thread(target=store.tools_for, args=("same-sha", "v1", fetch, lambda text: {"Django"}))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fetches) == 1
+    assert store.stats["hits"] == 7
+    # Per-blob locks are dropped once nobody waits on them, so a long-running watcher does not grow.
+    assert store._pending == {}
+
+
+def test_prune_keeps_only_what_referenced_trees_need(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs.sqlite3"))
+    store.put_tree("old-tree", pack_paths(["package.json"]), {"package.json": "old-blob"})
+    new_paths = {"package.json": "new-blob", "requirements.txt": "shared"}
+    store.put_tree("new-tree", pack_paths(new_paths), new_paths)
+    for sha in ("old-blob", "new-blob", "shared"):
+        store.tools_for(sha, "v1", lambda: "react", lambda text: {"React"})
+
+    # Everything written since the last prune survives it, even if unreferenced.
+    assert store.prune(["new-tree"]) == 0
+    assert store.prune(["new-tree"]) == 3
+    assert store.tree("old-tree") is None
+    assert store.text("old-blob") is None
+    assert store.cached_tools("old-blob", "v1") is None
+    assert store.tree("new-tree") is not None
+    assert store.text("shared") == "react"
+    assert store.cached_tools("new-blob", "v1") == {"React"}
+
+
+def test_partial_text_is_detected_but_not_stored_as_the_blob(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs.sqlite3"))
+
+    tools = store.tools_for("big", "v1", lambda: PartialText("django\n"), lambda text: {"Django"})
+
+    assert tools == {"Django"}
+    assert store.text("big") is None
+    assert store.cached_tools("big", "v1") == {"Django"}
@@ -1,3 +1,8 @@
+from collections import Counter
+
+import pytest
+
+import blob_store
 import generate_stack_section
 from generate_stack_section import (
     README_MARKER_END,
@@ -169,3 +174,554 @@ Footer
     assert "old" not in updated
     assert updated.startswith("Header")
     assert updated.strip().endswith("Footer")
+
+
+def _install_fake_account(monkeypatch, tmp_path, repo_count=12, with_blob_shas=False):
+    import random
+    import time
+
+    repos = [
+        {
+            "id": index,
+            "full_name": f"FahadBinHussain/repo-{index}",
+            "languages_url": f"lang-{index}",
+            "pushed_at": "2026-10-01T00:00:00Z",
+        }
+        for index in range(repo_count)
+    ]
+    trees = {
+        repo["id"]: ["package.json", "requirements.txt", "Dockerfile"][: index % 3 + 1]
+        for index, repo in enumerate(repos)
+    }
+
+    calls = Counter()
+
+    def fake_languages(repo, headers):
+        calls["languages"] += 1
+        time.sleep(random.random() / 200)
+        index = int(repo["languages_url"].split("-")[1])
+        return generate_stack_section.Counter({"Python": 100 + index, "JavaScript": 100 + repo_count - index})
+
+    def fake_tree(repo, headers, keep=None, pack=False):
+        time.sleep(random.random() / 200)
+        calls["tree"] += 1
+        paths = trees[repo["id"]]
+        return generate_stack_section.TreeListing(
+            f"sha-{len(paths)}",
+            paths,
+            {path: f"blob-{path}" for path in paths} if with_blob_shas else {},
+            blob_count=len(paths),
+            packed_paths=blob_store.pack_paths(paths) if pack else None,
+        )
+
+    def fake_content(repo, headers, path):
+        calls["content"] += 1
+        time.sleep(random.random() / 200)
+        return '{"dependencies": {"react": "1", "express": "1"}}' if path == "package.json" else "flask\nrequests"
+
+    def fake_blob(repo, headers, sha):
+        return fake_content(repo, headers, sha.removeprefix("blob-"))
+
+    monkeypatch.setattr(generate_stack_section, "build_headers", lambda: {})
+    monkeypatch.setattr(generate_stack_section, "fetch_repositories", lambda username, headers: repos)
+    monkeypatch.setattr(generate_stack_section, "fetch_languages", fake_languages)
+    monkeypatch.setattr(generate_stack_section, "fetch_tree", fake_tree)
+    monkeypatch.setattr(generate_stack_section, "fetch_file_content", fake_content)
+    monkeypatch.setattr(generate_stack_section, "fetch_blob_content", fake_blob)
+    store = blob_store.BlobStore(str(tmp_path / "blobs.sqlite3"))
+    monkeypatch.setattr(blob_store, "get_store", lambda: store)
+    monkeypatch.setattr(generate_stack_section, "DEFAULT_SNAPSHOT_PATH", str(tmp_path / "snapshots.json"))
+    monkeypatch.setattr(generate_stack_section, "DEFAULT_PREFLIGHT_PATH", str(tmp_path / "preflight.json"))
+    monkeypatch.setattr(generate_stack_section.http_cache, "get_cache", lambda: None)
+    return repos, calls
+
+
+def test_gather_stack_concurrent_matches_serial(monkeypatch, tmp_path, capsys):
+    _install_fake_account(monkeypatch, tmp_path)
+
+    serial = generate_stack_section.gather_stack("FahadBinHussain", workers=1, force_full_scan=True)
+    serial_log = capsys.readouterr().out
+    concurrent = generate_stack_section.gather_stack("FahadBinHussain", workers=6, force_full_scan=True)
+    concurrent_log = capsys.readouterr().out
+
+    assert concurrent == serial
+    assert concurrent_log == serial_log
+    assert "Inspecting package.json" in serial_log
+
+
+def test_graphql_backend_matches_rest(monkeypatch, tmp_path, capsys):
+    import re as regex
+
+    _install_fake_account(monkeypatch, tmp_path)
+    rest = generate_stack_section.gather_stack("FahadBinHussain", workers=1, force_full_scan=True)
+    capsys.readouterr()
+
+    repos = generate_stack_section.fetch_repositories("FahadBinHussain", {})
+    requests_made = []
+
+    class FakeResponse:
+        def __init__(self, payload):
+            self.payload = payload
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return self.payload
+
+    def fake_request(method, url, headers=None, json=None):
+        requests_made.append(json["query"])
+        data = {}
+        for alias, name in regex.findall(r'(r\d+): repository\(owner: "[^"]+", name: "([^"]+)"\)', json["query"]):
+            repo = next(repo for repo in repos if repo["full_name"].endswith(f"/{name}"))
+            languages = generate_stack_section.fetch_languages(repo, headers)
+            node = {"languages": {"edges": [{"size": size, "node": {"name": lang}} for lang, size in languages.items()]}}
+            tree = generate_stack_section.fetch_tree(repo, headers).paths
+            for index, candidate in enumerate(generate_stack_section.MANIFEST_CANDIDATES):
+                node[f"m{index}"] = (
+                    {"text": generate_stack_section.fetch_file_content(repo, headers, candidate)}
+                    if candidate in tree
+                    else None
+                )
+            data[alias] = node
+        return FakeResponse({"data": data})
+
+    monkeypatch.setattr(generate_stack_section, "build_headers", lambda: {"Authorization": "Bearer t"})
+    monkeypatch.setattr(generate_stack_section.http_client, "request", fake_request)
+    graphql = generate_stack_section.gather_stack(
+        "FahadBinHussain", workers=1, backend="graphql", force_full_scan=True
+    )
+
+    assert graphql == rest
+    assert len(requests_made) == 1
+
+
+def test_gather_stack_only_rescans_pushed_repositories(monkeypatch, tmp_path, capsys):
+    repos, calls = _install_fake_account(monkeypatch, tmp_path, repo_count=4)
+
+    full = generate_stack_section.gather_stack("FahadBinHussain", workers=1)
+    assert calls["languages"] == 4
+
+    calls.clear()
+    assert generate_stack_section.gather_stack("FahadBinHussain", workers=1) == full
+    assert sum(calls.values()) == 0
+
+    repos[1]["pushed_at"] = "2026-10-02T00:00:00Z"
+    repos[2]["full_name"] = "FahadBinHussain/renamed"
+    del repos[3]
+    generate_stack_section.gather_stack("FahadBinHussain", workers=1)
+    assert calls["languages"] == 1
+    assert calls["content"] == 0  # tree SHA unchanged, so manifests are not refetched
+
+    snapshots = generate_stack_section.load_snapshots(str(tmp_path / "snapshots.json"))
+    assert sorted(snapshots) == ["0", "1", "2"]
+    assert snapshots["2"]["full_name"] == "FahadBinHussain/renamed"
+
+    calls.clear()
+    generate_stack_section.gather_stack("FahadBinHussain", workers=1, force_full_scan=True)
+    assert calls["languages"] == 3
+
+
+def _reference_detect_tools_from_paths(paths):
+    detected = set()
+    path_set = set(paths)
+    for hint_path, tools in generate_stack_section.FILE_HINTS.items():
+        if (
+            hint_path in path_set
+            or any(path.startswith(f"{hint_path}/") for path in path_set)
+            or any(path.endswith(f"/{hint_path}") for path in path_set)
+            or any(path.endswith(hint_path) for path in path_set if hint_path.startswith("."))
+            or any(path.endswith(f".{hint_path}") for path in path_set if "." not in hint_path and "/" not in hint_path)
+        ):
+            detected.update(tools)
+    return detected
+
+
+def test_path_matcher_matches_reference_on_random_trees():
+    import random
+
+    rng = random.Random(20261018)
+    hints = list(generate_stack_section.FILE_HINTS)
+    fragments = hints + ["src", "app", "lib", "docs", "README.md", "index", "x", ".", "main", "Dockerfile2"]
+
+    for _ in range(300):
+        paths = []
+        for _ in range(rng.randint(0, 40)):
+            depth = rng.randint(1, 4)
+            parts = [rng.choice(fragments) for _ in range(depth)]
+            if rng.random() < 0.3:
+                parts[-1] = rng.choice(["My", "app", "", "x."]) + rng.choice(hints)
+            paths.append("/".join(parts))
+        assert detect_tools_from_paths(paths) == _reference_detect_tools_from_paths(paths), paths
+
+
+def _reference_detect_tools_from_content(content):
+    detected = set()
+    lowered = content.lower()
+    for needle, tools in generate_stack_section.CONTENT_HINTS.items():
+        if needle in lowered:
+            detected.update(tools)
+    return detected
+
+
+def test_content_scanner_matches_reference_for_overlapping_needles():
+    import random
+
+    rng = random.Random(7)
+    needles = list(generate_stack_section.CONTENT_HINTS)
+    fragments = needles + ["x", " ", ".", "-", "NEXT", "py", "js", "st", "Tauri"]
+    scanners = [
+        generate_stack_section.ContentHintScanner(generate_stack_section.CONTENT_HINTS, chunk_size=size)
+        for size in (1, 3, 7, 16)
+    ]
+
+    for _ in range(500):
+        content = "".join(rng.choice(fragments)[rng.randint(0, 3) :] for _ in range(rng.randint(0, 15)))
+        scanner = rng.choice(scanners)
+        assert scanner.scan(content) == _reference_detect_tools_from_content(content), content
+        assert detect_tools_from_content(content) == _reference_detect_tools_from_content(content), content
+
+
+def test_detect_tools_from_chunks_finds_needles_across_boundaries():
+    chunks = ["dependencies: tail", "windCSS, Vite", "st, @reduxjs/too", "lkit"]
+
+    detected = generate_stack_section.detect_tools_from_chunks(chunks)
+
+    assert detected == _reference_detect_tools_from_content("".join(chunks))
+    assert {"Tailwind CSS", "Vitest", "Vite", "Redux"} <= detected
+
+
+def test_gather_stack_defers_repositories_beyond_rate_limit_budget(monkeypatch, tmp_path, capsys):
+    _, calls = _install_fake_account(monkeypatch, tmp_path, repo_count=6)
+    expected = generate_stack_section.gather_stack(
+        "FahadBinHussain", workers=1, snapshot_path=str(tmp_path / "expected.json")
+    )
+    calls.clear()
+
+    readme = tmp_path / "README.md"
+    previous = f"{README_MARKER_START}\nprevious stack\n{README_MARKER_END}\n"
+    readme.write_text(previous)
+
+    budget = generate_stack_section.RATE_LIMIT_RESERVE + 2 * generate_stack_section.estimate_repo_cost(None)
+    monkeypatch.setattr(generate_stack_section.http_client, "rate_limit_remaining", lambda url, headers: budget)
+    generate_stack_section.update_readme_stack(str(readme), "FahadBinHussain")
+    assert calls["languages"] == 2
+    log = capsys.readouterr().out
+    assert "Deferring 4 repositories" in log
+    # Four repos have no snapshot yet, so the section is not rewritten from the other two.
+    assert readme.read_text() == previous
+    assert "Keeping the current" in log
+
+    monkeypatch.setattr(generate_stack_section.http_client, "rate_limit_remaining", lambda url, headers: None)
+    assert generate_stack_section.gather_stack("FahadBinHussain", workers=1) == expected
+    assert calls["languages"] == 6
+
+
+def test_empty_repositories_are_checkpointed_like_any_other(monkeypatch, tmp_path, capsys):
+    from fake_github import FakeGitHub, SyntheticAccount
+
+    account = SyntheticAccount(repo_count=2, tree_size=5)
+    account.create("empty", {}, {}, pushed_at="2026-10-01T00:00:00Z")
+    # The listing's size is in KB and lags behind pushes, so it says nothing either way.
+    account.create("stale-size", {}, {}, pushed_at="2026-10-02T00:00:00Z")["size"] = 1
+    account.create("small", {"requirements.txt": "flask\n"}, {"Python": 10}, pushed_at="2026-10-03T00:00:00Z")
+    account.repo("bench-user/small")["size"] = 0
+    readme = tmp_path / "README.md"
+    readme.write_text(f"{README_MARKER_START}\n{README_MARKER_END}\n")
+    store = blob_store.BlobStore(str(tmp_path / "blobs.sqlite3"))
+    monkeypatch.setattr(blob_store, "get_store", lambda: store)
+    monkeypatch.setattr(generate_stack_section.http_cache, "get_cache", lambda: None)
+    monkeypatch.setattr(generate_stack_section, "build_headers", lambda: {})
+    monkeypatch.setattr(generate_stack_section, "DEFAULT_SNAPSHOT_PATH", str(tmp_path / "snapshots.json"))
+    monkeypatch.setattr(generate_stack_section, "DEFAULT_PREFLIGHT_PATH", str(tmp_path / "preflight.json"))
+
+    with FakeGitHub(account) as server:
+        monkeypatch.setattr(generate_stack_section, "GITHUB_API_URL", server.url)
+        generate_stack_section.update_readme_stack(str(readme), account.username)
+        assert "/repos/bench-user/empty/git/trees/main" in server.paths
+        assert "/repos/bench-user/stale-size/git/trees/main" in server.paths
+        snapshots = generate_stack_section.load_snapshots(str(tmp_path / "snapshots.json"))
+        assert len(snapshots) == 5
+        small = account.repo("bench-user/small")
+        assert snapshots[str(small["id"])]["tools"] == ["Flask", "Python"]
+        assert "Flask" in readme.read_text()
+
+        server.reset_counters()
+        generate_stack_section.update_readme_stack(str(readme), account.username)
+        assert server.paths == ["/users/bench-user/repos"]
+        assert "skipping the stack scan" in capsys.readouterr().out
+
+
+def test_fetch_tree_streams_and_keeps_only_hinted_paths(monkeypatch):
+    import json
+
+    tree = {
+        "sha": "tree-sha",
+        "url": "https://api.github.com/repos/a/b/git/trees/tree-sha",
+        "tree": [{"path": f"data/sample-{index}.csv", "type": "blob", "sha": f"{index}", "size": index} for index in range(500)]
+        + [
+            {"path": "src", "type": "tree", "sha": "t"},
+            {"path": "package.json", "type": "blob", "sha": "pkg", "size": 10},
+            {"path": ".github/workflows/ci.yml", "type": "blob", "sha": "ci", "size": 10},
+        ],
+        "truncated": False,
+    }
+    body = json.dumps(tree, indent=1).encode()
+
+    class StreamingResponse:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def raise_for_status(self):
+            pass
+
+        def iter_content(self, chunk_size):
+            for start in range(0, len(body), 7):
+                yield body[start : start + 7]
+
+    requested = {}
+
+    def fake_get(url, **kwargs):
+        requested.update(kwargs)
+        return StreamingResponse()
+
+    monkeypatch.setattr(generate_stack_section.http_client, "get", fake_get)
+    listing = generate_stack_section.fetch_tree(
+        {"full_name": "a/b", "default_branch": "main"}, {}, keep=generate_stack_section.is_hinted_path
+    )
+
+    assert requested["stream"] is True
+    assert listing.sha == "tree-sha"
+    assert listing.blob_count == 502
+    assert listing.paths == ["package.json", ".github/workflows/ci.yml"]
+    assert listing.blob_shas["package.json"] == "pkg"
+
+
+def test_batch_scans_shared_repos_once_and_writes_each_readme(monkeypatch, tmp_path, capsys):
+    repos, calls = _install_fake_account(monkeypatch, tmp_path, repo_count=9)
+    listings = {"alice": repos[:6], "bob": repos[3:]}
+    monkeypatch.setattr(
+        generate_stack_section, "fetch_repositories", lambda username, headers, authenticated=None: listings[username]
+    )
+    readmes = {}
+    for username in listings:
+        readmes[username] = tmp_path / f"{username}.md"
+        readmes[username].write_text(
+            f"# {username}\n{generate_stack_section.README_MARKER_START}\n{generate_stack_section.README_MARKER_END}\n"
+        )
+
+    generate_stack_section.main([f"{username}={path}" for username, path in readmes.items()])
+
+    assert calls["tree"] == len(repos)
+    for username, listing in listings.items():
+        monkeypatch.setattr(
+            generate_stack_section, "fetch_repositories", lambda name, headers, authenticated=None: listing
+        )
+        expected = generate_stack_section.build_stack_block(
+            *generate_stack_section.gather_stack(username, force_full_scan=True)
+        ).strip()
+        assert expected in readmes[username].read_text()
+    assert "alice: Final tools:" in capsys.readouterr().out
+
+
+def test_read_targets_skips_comments_and_rejects_bad_lines(tmp_path):
+    import argparse
+
+    path = tmp_path / "targets.txt"
+    path.write_text("# team\nalice=profiles/alice/README.md\n\nbob=README.md\n")
+    assert generate_stack_section.read_targets(str(path)) == [
+        ("alice", "profiles/alice/README.md"),
+        ("bob", "README.md"),
+    ]
+
+    path.write_text("carol\n")
+    with pytest.raises(argparse.ArgumentTypeError):
+        generate_stack_section.read_targets(str(path))
+
+
+def test_unchanged_inputs_skip_the_scan_until_forced_or_pushed(monkeypatch, tmp_path, capsys):
+    repos, calls = _install_fake_account(monkeypatch, tmp_path, repo_count=4)
+    readme = tmp_path / "README.md"
+    readme.write_text(f"{generate_stack_section.README_MARKER_START}\n{generate_stack_section.README_MARKER_END}\n")
+
+    generate_stack_section.update_readme_stack(str(readme), "FahadBinHussain")
+    written = readme.read_text()
+    trees = calls["tree"]
+    generate_stack_section.update_readme_stack(str(readme), "FahadBinHussain")
+
+    assert calls["tree"] == trees
+    assert readme.read_text() == written
+    assert "skipping the stack scan" in capsys.readouterr().out
+
+    generate_stack_section.update_readme_stack(str(readme), "FahadBinHussain", force=True)
+    assert "skipping the stack scan" not in capsys.readouterr().out
+
+    repos[0]["pushed_at"] = "2026-10-02T00:00:00Z"
+    generate_stack_section.update_readme_stack(str(readme), "FahadBinHussain")
+    assert calls["tree"] == trees + 1
+
+    readme.write_text(f"{generate_stack_section.README_MARKER_START}\nedited\n{generate_stack_section.README_MARKER_END}\n")
+    generate_stack_section.update_readme_stack(str(readme), "FahadBinHussain")
+    assert readme.read_text() == written
+
+
+def test_hint_changes_are_redetected_offline(monkeypatch, tmp_path, capsys):
+    repos, calls = _install_fake_account(monkeypatch, tmp_path, repo_count=6, with_blob_shas=True)
+    before = generate_stack_section.gather_stack("FahadBinHussain", workers=1)
+    assert "Docker" in before[1] and "Flask" in before[1]
+
+    monkeypatch.setitem(generate_stack_section.FILE_HINTS, "Dockerfile", {"Podman"})
+    monkeypatch.setitem(generate_stack_section.BADGE_MAP, "Podman", ("Podman", "podman", "white", "892CA0"))
+    monkeypatch.delitem(generate_stack_section.CONTENT_HINTS, "flask")
+    # The matchers are built from the tables at import time, as an edited module would be.
+    monkeypatch.setattr(
+        generate_stack_section, "PATH_MATCHER", generate_stack_section.PathHintMatcher(generate_stack_section.FILE_HINTS)
+    )
+    monkeypatch.setattr(
+        generate_stack_section,
+        "CONTENT_SCANNER",
+        generate_stack_section.ContentHintScanner(generate_stack_section.CONTENT_HINTS),
+    )
+    monkeypatch.setattr(
+        generate_stack_section,
+        "DEPENDENCY_MATCHER",
+        generate_stack_section.DependencyHintMatcher(generate_stack_section.CONTENT_HINTS),
+    )
+    calls.clear()
+    capsys.readouterr()
+
+    offline = generate_stack_section.redetect_stacks(["FahadBinHussain"])
+    assert sum(calls.values()) == 0
+    assert "Podman" in offline["FahadBinHussain"][1]
+    assert "Docker" not in offline["FahadBinHussain"][1]
+    assert "Flask" not in offline["FahadBinHussain"][1]
+    assert "Re-detected 6 repositories offline" in capsys.readouterr().out
+
+    # The re-detected snapshots are current, so an online run only lists repos.
+    assert generate_stack_section.gather_stack("FahadBinHussain", workers=1) == offline["FahadBinHussain"]
+    assert sum(calls.values()) == 0
+
+
+def test_manifest_detection_reads_declared_dependencies_only():
+    package_json = (
+        '{"description": "a nextcloud client", "scripts": {"deploy": "vercel"},'
+        ' "dependencies": {"preact": "^10", "next-auth": "^4", "@types/react": "^18"}}'
+    )
+
+    assert generate_stack_section.detect_tools_from_manifest("package.json", package_json) == {"Next.js", "React"}
+    assert generate_stack_section.detect_tools_from_manifest("requirements.txt", "psycopg2-binary\n") == {"PostgreSQL"}
+    # Hints glued to a common affix still count.
+    requirements = "mysqlclient\nPyMySQL\ndjangorestframework\ntorchvision\naioredis\n"
+    assert generate_stack_section.detect_tools_from_manifest("requirements.txt", requirements) == {
+        "MySQL",
+        "Django",
+        "PyTorch",
+        "Redis",
+    }
+    vite_plugin = '{"devDependencies": {"@vitejs/plugin-react": "^4"}}'
+    assert generate_stack_section.detect_tools_from_manifest("package.json", vite_plugin) == {"Vite", "React"}
+    # Formats without a parser keep the substring scan, within the byte cap.
+    assert generate_stack_section.detect_tools_from_manifest("_config.yml", "theme: jekyll-theme") == {"Jekyll"}
+    assert generate_stack_section.detect_tools_from_manifest("_config.yml", "x" * 100 + "jekyll", max_bytes=50) == set()
+
+
+def test_file_contents_are_streamed_raw_up_to_the_cap(monkeypatch):
+    from fake_github import FakeGitHub, SyntheticAccount
+
+    account = SyntheticAccount(repo_count=1, tree_size=5)
+    repo = account.repos[0]
+    text = "flask\n" + "é" * 300_000
+    account.blobs["big"] = text
+    account.trees[repo["full_name"]]["files"]["requirements.txt"] = text
+
+    with FakeGitHub(account) as server:
+        monkeypatch.setattr(generate_stack_section, "GITHUB_API_URL", server.url)
+
+        run_metrics = generate_stack_section.run_metrics
+        monkeypatch.setattr(run_metrics, "metrics", run_metrics.RunMetrics())
+        full = generate_stack_section.fetch_blob_content(repo, {}, "big", max_bytes=2_000_000)
+        assert full == text
+        assert not isinstance(full, blob_store.PartialText)
+        # Raw bodies are the file itself: no JSON wrapping or base64 overhead.
+        assert server.metrics()["bytes"] == len(text.encode())
+        assert run_metrics.metrics.counters["http_bytes"] == len(text.encode())
+
+        server.reset_counters()
+        capped = generate_stack_section.fetch_file_content(repo, {}, "requirements.txt", max_bytes=1001)
+        assert capped == text[:503]  # 6 ASCII bytes, then 497 whole two-byte characters
+        assert isinstance(capped, blob_store.PartialText)
+        assert server.metrics()["requests"] == 1
+
+        # A file exactly as long as the cap is complete, not cut short.
+        exact = generate_stack_section.fetch_blob_content(repo, {}, "big", max_bytes=len(text.encode()))
+        assert exact == text
+        assert not isinstance(exact, blob_store.PartialText)
+
+
+def test_nested_manifests_are_ranked_by_novelty_depth_and_blob():
+    paths = [
+        "package.json",
+        "apps/web/package.json",
+        "apps/admin/package.json",
+        "apps/web/node_modules/react/package.json",
+        "services/api/requirements.txt",
+        "services/api/deep/nested/go.mod",
+        "tools/copy/package.json",
+        "docs/_config.yml",
+    ]
+    blob_shas = {path: f"sha-{path}" for path in paths}
+    blob_shas["tools/copy/package.json"] = blob_shas["package.json"]
+
+    selected = generate_stack_section.select_nested_manifests(paths, blob_shas, limit=10, skip_shas=["sha-package.json"])
+
+    assert selected == [
+        "apps/admin/package.json",
+        "services/api/requirements.txt",
+        "services/api/deep/nested/go.mod",
+        "apps/web/package.json",
+    ]
+    assert generate_stack_section.select_nested_manifests(paths, blob_shas, limit=2, skip_shas=["sha-package.json"]) == [
+        "apps/admin/package.json",
+        "services/api/requirements.txt",
+    ]
+
+
+def test_nested_manifests_are_fetched_within_the_run_budget(monkeypatch, tmp_path):
+    paths = ["package.json", "apps/web/package.json", "services/api/requirements.txt"]
+    blob_shas = {path: f"sha-{index}" for index, path in enumerate(paths)}
+    texts = {
+        "sha-0": '{"dependencies": {"express": "4"}}',
+        "sha-1": '{"dependencies": {"react": "18"}}',
+        "sha-2": "fastapi\n",
+    }
+    fetched = []
+
+    def fake_blob(repo, headers, sha):
+        fetched.append(sha)
+        return texts[sha]
+
+    store = blob_store.BlobStore(str(tmp_path / "blobs.sqlite3"))
+    monkeypatch.setattr(blob_store, "get_store", lambda: store)
+    monkeypatch.setattr(generate_stack_section, "fetch_blob_content", fake_blob)
+    repo = {"full_name": "me/monorepo"}
+
+    log = []
+    budget = generate_stack_section.ManifestBudget(1)
+    tools, complete, count = generate_stack_section.inspect_manifests(
+        repo, {}, paths, log, blob_shas=blob_shas, budget=budget
+    )
+    assert tools == {"Express", "React"}
+    assert (complete, count, budget.remaining) == (False, 2, 0)
+    assert "  Deferred 1 nested manifests: the run's manifest budget is spent" in log
+
+    # Blobs already in the store cost nothing, so the next run only spends budget on the rest.
+    fetched.clear()
+    budget = generate_stack_section.ManifestBudget(1)
+    tools, complete, count = generate_stack_section.inspect_manifests(
+        repo, {}, paths, [], blob_shas=blob_shas, budget=budget
+    )
+    assert tools == {"Express", "React", "FastAPI"}
+    assert (complete, count, fetched) == (True, 3, ["sha-2"])
@@ -0,0 +1,76 @@
+import requests
+
+import http_cache
+import http_client
+
+
+def make_response(status_code, body=b"", headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    response.headers.update(headers or {})
+    return response
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.sent_headers = []
+
+    def request(self, method, url, headers=None, **kwargs):
+        self.sent_headers.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+def test_not_modified_replays_cached_body(tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path / "cache.sqlite3"))
+    session = FakeSession(
+        [
+            make_response(200, b'{"Python": 10}', {"ETag": '"abc"', "Content-Type": "application/json"}),
+            make_response(304, headers={"X-RateLimit-Remaining": "4999"}),
+        ]
+    )
+    url = "https://api.github.com/repos/a/b/languages"
+
+    first = http_client.get(url, headers={"Authorization": "Bearer t"}, session=session, cache=cache)
+    second = http_client.get(url, headers={"Authorization": "Bearer t"}, session=session, cache=cache)
+
+    assert first.json() == second.json() == {"Python": 10}
+    assert second.status_code == 200
+    assert second.headers["X-RateLimit-Remaining"] == "4999"
+    assert session.sent_headers[1]["If-None-Match"] == '"abc"'
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+    assert "1 hits, 1 misses" in cache.summary()
+
+
+def test_cache_key_depends_on_params_and_token():
+    url = "https://api.github.com/user/repos"
+    base = http_cache.HttpCache.key(url, {"page": 1}, {"Authorization": "Bearer a"})
+
+    assert base == http_cache.HttpCache.key(url, {"page": 1}, {"Authorization": "Bearer a"})
+    assert base != http_cache.HttpCache.key(url, {"page": 2}, {"Authorization": "Bearer a"})
+    assert base != http_cache.HttpCache.key(url, {"page": 1}, {"Authorization": "Bearer b"})
+    assert base != http_cache.HttpCache.key(url, {"page": 1}, {})
+
+
+def test_responses_without_validators_are_not_stored(tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path / "cache.sqlite3"))
+    session = FakeSession([make_response(200, b"{}")])
+
+    http_client.get("https://api.github.com/x", session=session, cache=cache)
+
+    assert cache.stats["stored"] == 0
+    assert cache.lookup(cache.key("https://api.github.com/x")) is None
+
+
+def test_cache_evicts_least_recently_used_rows(tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path / "cache.sqlite3"), max_bytes=25)
+    for index in range(3):
+        url = f"https://api.github.com/{index}"
+        cache.store(cache.key(url), url, make_response(200, b"x" * 10, {"ETag": str(index)}))
+
+    assert cache.stats["evicted"] == 1
+    assert cache.lookup(cache.key("https://api.github.com/0")) is None
+    assert cache.lookup(cache.key("https://api.github.com/2")) is not None
+    assert cache.size() <= 25
@@ -0,0 +1,123 @@
+import pytest
+import requests
+
+import http_client
+
+
+@pytest.fixture(autouse=True)
+def no_http_cache(monkeypatch):
+    monkeypatch.setattr(http_client.http_cache, "get_cache", lambda: None)
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = b""
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_request_retries_transient_errors_with_backoff():
+    session = FakeSession([FakeResponse(502), requests.ConnectionError("reset"), FakeResponse(200)])
+    delays = []
+
+    response = http_client.get("https://api.github.com/user/repos", session=session, sleep=delays.append)
+
+    assert response.status_code == 200
+    assert len(session.calls) == 3
+    assert len(delays) == 2
+    assert all(0 <= delay <= http_client.BACKOFF_CAP for delay in delays)
+
+
+def test_request_honors_retry_after():
+    session = FakeSession([FakeResponse(429, {"Retry-After": "7"}), FakeResponse(200)])
+    delays = []
+
+    http_client.get("https://api.github.com/repos/a/b", session=session, sleep=delays.append)
+
+    assert delays == [7.0]
+
+
+def test_request_does_not_retry_plain_forbidden_or_not_found():
+    for status in (403, 404):
+        session = FakeSession([FakeResponse(status)])
+        response = http_client.get("https://api.github.com/repos/a/b", session=session, sleep=pytest.fail)
+        assert response.status_code == status
+        assert len(session.calls) == 1
+
+
+def test_request_gives_up_after_max_retries():
+    session = FakeSession([FakeResponse(503)] * 3)
+
+    response = http_client.get("https://api.github.com/", session=session, retries=2, sleep=lambda _: None)
+
+    assert response.status_code == 503
+    assert len(session.calls) == 3
+
+
+def test_request_uses_per_host_timeouts():
+    session = FakeSession([FakeResponse(200), FakeResponse(200)])
+
+    http_client.get("https://api.github.com/user", session=session)
+    http_client.get("https://wakapi-qt1b.onrender.com/api/heartbeats", session=session)
+
+    assert session.calls[0][2]["timeout"] == http_client.HOST_TIMEOUTS["api.github.com"]
+    assert session.calls[1][2]["timeout"] == http_client.HOST_TIMEOUTS["wakapi-qt1b.onrender.com"]
+
+
+def test_tracker_fails_fast_once_budget_is_exhausted():
+    now = 1_000_000.0
+    tracker = http_client.RateLimitTracker(clock=lambda: now)
+    bucket = tracker.bucket("https://api.github.com/user/repos", {"Authorization": "Bearer t"})
+
+    tracker.acquire(bucket)
+    tracker.release(bucket, FakeResponse(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(now + 900)}))
+
+    assert tracker.remaining(bucket) == 0
+    with pytest.raises(http_client.RateLimitExhausted):
+        tracker.acquire(bucket)
+    other_token = tracker.bucket("https://api.github.com/user/repos", {"Authorization": "Bearer other"})
+    tracker.acquire(other_token)
+
+
+def test_tracker_serializes_requests_near_the_limit():
+    import threading
+
+    tracker = http_client.RateLimitTracker(max_in_flight=8, low_watermark=100)
+    bucket = tracker.bucket("https://api.github.com/repos/a/b", {})
+    tracker.acquire(bucket)
+    tracker.acquire(bucket)
+    tracker.release(bucket, FakeResponse(200, {"X-RateLimit-Remaining": "40", "X-RateLimit-Reset": "9999999999"}))
+
+    waiter = threading.Thread(target=tracker.acquire, args=(bucket,))
+    waiter.start()
+    waiter.join(timeout=0.2)
+    assert waiter.is_alive()
+
+    tracker.release(bucket)
+    waiter.join(timeout=1)
+    assert not waiter.is_alive()
+
+
+def test_request_raises_when_rate_limit_resets_too_late(monkeypatch):
+    monkeypatch.setattr(http_client, "rate_limits", http_client.RateLimitTracker())
+    reset = str(int(http_client.time.time()) + 3600)
+    session = FakeSession([FakeResponse(403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset})])
+
+    with pytest.raises(http_client.RateLimitExhausted):
+        http_client.get("https://api.github.com/repos/a/b", session=session, sleep=pytest.fail)
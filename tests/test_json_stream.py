@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+import run_metrics
+from json_stream import ArrayStreamParser, parse_response
+
+
+def _parse(text, chunk_size):
+    items = []
+    parser = ArrayStreamParser("data", items.append)
+    for start in range(0, len(text), chunk_size):
+        parser.feed(text[start : start + chunk_size])
+    parser.feed("", final=True)
+    return items, parser.fields
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 10_000])
+def test_items_and_fields_survive_any_chunking(chunk_size):
+    payload = {
+        "start": "2026-10-18",
+        "data": [{"project": f"p{i}", "time": 1_700_000_000.5 + i, "tags": [i, None, True]} for i in range(20)],
+        "total": 20,
+        "timezone": "UTC",
+    }
+    items, fields = _parse(json.dumps(payload, indent=1), chunk_size)
+    assert items == payload["data"]
+    assert fields == {"start": "2026-10-18", "total": 20, "timezone": "UTC"}
+
+
+def test_truncated_input_is_rejected():
+    parser = ArrayStreamParser("data", lambda item: None)
+    parser.feed('{"data": [{"project": "a"}, ')
+    with pytest.raises(ValueError):
+        parser.feed("", final=True)
+
+
+def test_non_array_field_is_rejected():
+    parser = ArrayStreamParser("data", lambda item: None)
+    with pytest.raises(ValueError):
+        parser.feed('{"data": {"project": "a"}}', final=True)
+
+
+def test_parse_response_counts_streamed_bytes(monkeypatch):
+    body = json.dumps({"data": [{"project": "é"}] * 50}).encode()
+
+    class ChunkedResponse:
+        def iter_content(self, chunk_size):
+            return (body[start : start + chunk_size] for start in range(0, len(body), chunk_size))
+
+    monkeypatch.setattr(run_metrics, "metrics", run_metrics.RunMetrics())
+    items = []
+
+    parse_response(ChunkedResponse(), ArrayStreamParser("data", items.append), chunk_size=16)
+
+    assert len(items) == 50
+    assert run_metrics.metrics.counters["http_bytes"] == len(body)
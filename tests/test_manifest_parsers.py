@@ -0,0 +1,208 @@
+import json
+
+from manifest_parsers import dependency_names, iter_lines
+
+
+def test_package_json_reads_only_dependency_sections():
+    content = json.dumps(
+        {
+            "name": "next-level-react-app",
+            "scripts": {"dev": "vite", "lint": "eslint ."},
+            "dependencies": {"react": "^18", "@reduxjs/toolkit": "^2"},
+            "devDependencies": {"Vitest": "^1"},
+            "peerDependencies": {"express": "*"},
+        }
+    )
+
+    assert dependency_names("package.json", [content]) == {"react", "@reduxjs/toolkit", "vitest", "express"}
+
+
+def test_package_json_truncated_by_the_cap_still_reads_complete_keys():
+    content = '{"dependencies": {"react": "^18", "axios": "^1"}, "devDependencies": {"jest": "^29", "eslint": "^8"}}'
+    cut = content.index('"eslint"') + 3
+
+    assert dependency_names("package.json", [content], max_bytes=cut) == {"react", "axios", "jest"}
+
+
+def test_requirements_skips_comments_options_and_urls():
+    content = "\n".join(
+        [
+            "# web stack",
+            "-r base.txt",
+            "--index-url https://example.com/simple",
+            "Flask>=2.0  # not django",
+            "uvicorn[standard]==0.23",
+            "discord.py ; python_version > '3.8'",
+            "psycopg2-binary",
+            "git+https://github.com/org/repo.git",
+            "torch @ https://download.pytorch.org/whl/torch.whl",
+        ]
+    )
+
+    assert dependency_names("requirements.txt", [content]) == {
+        "flask",
+        "uvicorn",
+        "discord.py",
+        "psycopg2-binary",
+        "torch",
+    }
+    assert dependency_names("requirements-dev.txt", ["pytest\n"]) == {"pytest"}
+
+
+def test_pyproject_reads_pep621_poetry_and_build_requirements():
+    content = """
+[build-system]
+requires = ["setuptools>=61", "wheel"]
+
+[project]
+name = "fastapi-next"
+description = "uses react"
+dependencies = [
+    "fastapi>=0.100",  # api
+    "uvicorn[standard]",
+]
+
+[project.optional-dependencies]
+ml = ["numpy", "scikit-learn>=1.3"]
+
+[tool.poetry.dependencies]
+python = "^3.11"
+requests = "^2.31"
+
+[tool.poetry.group.dev.dependencies]
+pytest = "*"
+
+[tool.ruff]
+select = ["E", "flask"]
+"""
+
+    assert dependency_names("pyproject.toml", [content]) == {
+        "setuptools",
+        "wheel",
+        "fastapi",
+        "uvicorn",
+        "numpy",
+        "scikit-learn",
+        "requests",
+        "pytest",
+    }
+
+
+def test_cargo_toml_reads_every_dependency_table():
+    content = """
+[package]
+name = "tauri-next"
+keywords = ["react"]
+
+[dependencies]
+serde = { version = "1", features = ["derive"] }
+tokio.workspace = true
+"tauri-build" = "1"
+
+[dependencies.tauri]
+version = "1"
+features = [
+    "shell-open",
+]
+
+[target.'cfg(windows)'.dependencies]
+windows = "0.48"
+
+[dev-dependencies]
+criterion = "0.5"
+"""
+
+    assert dependency_names("Cargo.toml", [content]) == {
+        "serde",
+        "tokio",
+        "tauri-build",
+        "tauri",
+        "windows",
+        "criterion",
+    }
+
+
+def test_go_mod_reads_single_and_block_requires():
+    content = """module github.com/me/next
+
+go 1.22
+
+require github.com/gin-gonic/gin v1.9.1
+
+require (
+    github.com/redis/go-redis/v9 v9.5.1 // indirect
+    gorm.io/gorm v1.25.7
+)
+
+replace example.com/old => example.com/new v1.0.0
+"""
+
+    assert dependency_names("go.mod", [content]) == {
+        "github.com/gin-gonic/gin",
+        "github.com/redis/go-redis/v9",
+        "gorm.io/gorm",
+    }
+
+
+def test_gradle_reads_plugins_and_dependencies_blocks_only():
+    content = """
+plugins {
+    id("com.android.application")
+    kotlin("android")
+}
+
+android {
+    namespace = "com.example.next"
+    buildFeatures { compose = true }
+}
+
+dependencies {
+    implementation("androidx.compose.ui:ui:1.6.0") // ui
+    implementation(libs.retrofit)
+    testImplementation 'junit:junit:4.13.2'
+}
+"""
+
+    assert dependency_names("app/build.gradle.kts", [content]) == {
+        "com.android.application",
+        "android",
+        "androidx.compose.ui:ui",
+        "retrofit",
+        "junit:junit",
+    }
+
+
+def test_gemfile_reads_gem_lines():
+    content = """source "https://rubygems.org"
+gem "github-pages", group: :jekyll_plugins
+gem 'rails', '~> 7.1'
+# gem "next"
+"""
+
+    assert dependency_names("Gemfile", [content]) == {"github-pages", "rails"}
+
+
+def test_unknown_manifest_has_no_parser():
+    assert dependency_names("pom.xml", ["<project/>"]) is None
+
+
+def test_iter_lines_holds_one_partial_line_and_drops_the_cut_one():
+    chunks = ["fla", "sk\nreq", "uests\ndjango\n", "numpy\n"]
+
+    assert list(iter_lines(chunks)) == ["flask", "requests", "django", "numpy"]
+    assert list(iter_lines(chunks, max_bytes=20)) == ["flask", "requests"]
+
+
+def test_parsers_stop_reading_at_the_cap():
+    consumed = []
+
+    def chunks():
+        yield "flask\n" * 10
+        for index in range(10_000):
+            consumed.append(index)
+            yield f"package-{index}\n"
+
+    names = dependency_names("requirements.txt", chunks(), max_bytes=200)
+
+    assert "flask" in names
+    assert len(consumed) < 20
@@ -0,0 +1,46 @@
+import os
+
+import readme_sections
+
+README = """# Profile
+<!--START_SECTION:waka-->
+waka stats
+<!--END_SECTION:waka-->
+Intro
+<!--START_SECTION:stack-->
+old stack
+<!--END_SECTION:stack-->
+<!--START_SECTION:current-projects-->
+old projects
+<!--END_SECTION:current-projects-->
+Footer
+"""
+
+
+def test_parse_sections_finds_every_marker_pair():
+    spans = readme_sections.parse_sections(README)
+
+    assert [span.name for span in spans] == ["waka", "stack", "current-projects"]
+    assert README[spans[1].body_start : spans[1].body_end] == "\nold stack\n"
+    assert README[spans[1].start : spans[1].end].startswith("<!--START_SECTION:stack-->")
+
+
+def test_replace_sections_updates_several_bodies_in_one_pass():
+    updated = readme_sections.replace_sections(
+        README, {"stack": "\nnew stack\n", "current-projects": "\nnew projects\n", "missing": "x"}
+    )
+
+    assert updated == README.replace("old stack", "new stack").replace("old projects", "new projects")
+
+
+def test_update_file_skips_unchanged_content_and_writes_atomically(tmp_path):
+    path = tmp_path / "README.md"
+    path.write_text(README, encoding="utf-8")
+    os.utime(path, (1_000, 1_000))
+
+    assert readme_sections.update_file(str(path), {"stack": "\nold stack\n"}) is False
+    assert path.stat().st_mtime == 1_000
+
+    assert readme_sections.update_file(str(path), {"stack": "\nnew stack\n"}) is True
+    assert "new stack" in path.read_text(encoding="utf-8")
+    assert sorted(os.listdir(tmp_path)) == ["README.md"]
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+import run_metrics
+from run_metrics import RunMetrics
+
+
+def test_spans_aggregate_by_name_and_count_errors():
+    ticks = iter([0.0, 0.0, 1.0, 1.0, 3.5, 10.0, 10.25, 20.0])
+    recorder = RunMetrics(clock=lambda: next(ticks))
+
+    with recorder.span("fetch_languages"):
+        pass
+    with recorder.span("fetch_languages"):
+        pass
+    with pytest.raises(ValueError):
+        with recorder.span("fetch_tree"):
+            raise ValueError("boom")
+    recorder.increment("http_requests", 3)
+
+    summary = recorder.summary("generate_stack_section")
+
+    assert summary["spans"]["fetch_languages"] == {
+        "count": 2,
+        "errors": 0,
+        "total_seconds": 3.5,
+        "max_seconds": 2.5,
+    }
+    assert summary["spans"]["fetch_tree"]["errors"] == 1
+    assert summary["counters"] == {"http_requests": 3}
+    assert summary["duration_seconds"] == 20.0
+
+
+def test_emit_appends_one_json_line_per_run(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(run_metrics, "metrics", RunMetrics())
+    path = tmp_path / "metrics.jsonl"
+
+    @run_metrics.timed()
+    def fetch_most_recent_projects():
+        return ["lore"]
+
+    fetch_most_recent_projects()
+    run_metrics.emit("update_readme", str(path))
+    run_metrics.emit("update_readme", str(path))
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 2
+    assert lines[0]["script"] == "update_readme"
+    assert lines[0]["spans"]["fetch_most_recent_projects"]["count"] == 1
+    assert "Run metrics:" in capsys.readouterr().out
@@ -0,0 +1,75 @@
+import random
+from collections import Counter
+
+import pytest
+
+from stack_stats import RankingPolicy, StackStats
+
+LANGUAGES = ["Python", "JavaScript", "TypeScript", "Rust", "Go", "HTML"]
+TOOLS = ["Docker", "React", "Flask", "Vite", "Node.js", "Redis"]
+
+
+def _random_rows(count, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        languages = Counter(
+            {language: rng.choice([100, 200, 5_000]) for language in rng.sample(LANGUAGES, rng.randint(0, 3))}
+        )
+        tools = set(rng.sample(TOOLS, rng.randint(0, 3)))
+        repo = {
+            "pushed_at": f"2026-{index % 12 + 1:02d}-01T00:00:00Z",
+            "size": rng.randint(1, 900),
+            "archived": index % 5 == 0,
+        }
+        rows.append((str(index), languages, tools, repo))
+    return rows
+
+
+def _counter_ranking(rows):
+    language_counts, tool_counts = Counter(), Counter()
+    for _, languages, tools, _ in rows:
+        language_counts.update(languages)
+        for tool in sorted(tools):
+            tool_counts[tool] += 1
+    return [name for name, _ in language_counts.most_common()], [name for name, _ in tool_counts.most_common()]
+
+
+def _stats(rows):
+    stats = StackStats()
+    for row in rows:
+        stats.add(*row)
+    return stats
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_default_policy_matches_counter_ranking(seed):
+    rows = _random_rows(300, seed)
+
+    assert _stats(rows).rank() == _counter_ranking(rows)
+
+
+def test_rows_and_archived_filters_select_subsets():
+    rows = _random_rows(200, 1)
+    stats = _stats(rows)
+    subset = [row for index, row in enumerate(rows) if index % 3 == 0]
+
+    assert stats.rank(rows=range(0, 200, 3)) == _counter_ranking(subset)
+    assert stats.rank(RankingPolicy(exclude_archived=True)) == _counter_ranking(
+        [row for row in rows if not row[3]["archived"]]
+    )
+
+
+def test_recency_and_normalized_policies_reweight_repos():
+    stats = StackStats()
+    stats.add("old", Counter({"Rust": 900_000}), {"Docker", "Flask"}, {"pushed_at": "2024-01-01T00:00:00Z"})
+    stats.add("older", Counter(), {"Docker"}, {"pushed_at": "2023-01-01T00:00:00Z"})
+    stats.add("new-1", Counter({"Python": 1_000, "Go": 1_000}), {"Vite"}, {"pushed_at": "2026-10-01T00:00:00Z"})
+    stats.add("new-2", Counter({"Python": 2_000}), {"Vite"}, {"pushed_at": "2026-09-01T00:00:00Z"})
+
+    assert stats.rank() == (["Rust", "Python", "Go"], ["Docker", "Vite", "Flask"])
+    assert stats.rank(RankingPolicy(weighting="recency", half_life_days=30)) == (
+        ["Python", "Go", "Rust"],
+        ["Vite", "Docker", "Flask"],
+    )
+    assert stats.rank(RankingPolicy(normalize_bytes=True))[0] == ["Python", "Rust", "Go"]
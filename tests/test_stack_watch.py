@@ -0,0 +1,141 @@
+import hashlib
+import hmac
+import json
+import queue
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import blob_store
+import generate_stack_section
+import http_cache
+import stack_watch
+import update_readme
+from fake_github import FakeGitHub, SyntheticAccount
+
+README = f"""# Profile
+{generate_stack_section.README_MARKER_START}
+{generate_stack_section.README_MARKER_END}
+
+## Contributors
+"""
+
+
+def _post(url, payload, event=None, secret=None):
+    body = json.dumps(payload).encode()
+    request = urllib.request.Request(url, data=body, method="POST")
+    if event:
+        request.add_header("X-GitHub-Event", event)
+    if secret:
+        digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        request.add_header("X-Hub-Signature-256", f"sha256={digest}")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status
+    except urllib.error.HTTPError as err:
+        return err.code
+
+
+@pytest.fixture
+def watched(monkeypatch, tmp_path):
+    account = SyntheticAccount(repo_count=6, tree_size=10)
+    readme = tmp_path / "README.md"
+    readme.write_text(README, encoding="utf-8")
+    store = blob_store.BlobStore(str(tmp_path / "blobs.sqlite3"))
+    monkeypatch.setattr(blob_store, "get_store", lambda: store)
+    monkeypatch.setattr(http_cache, "get_cache", lambda: None)
+    monkeypatch.setattr(generate_stack_section, "build_headers", lambda: {})
+    monkeypatch.setattr(generate_stack_section, "DEFAULT_SNAPSHOT_PATH", str(tmp_path / "snapshots.json"))
+
+    with FakeGitHub(account) as server:
+        monkeypatch.setattr(generate_stack_section, "GITHUB_API_URL", server.url)
+        watcher = stack_watch.StackWatcher([(account.username, str(readme))], projects_readme=str(readme), workers=1)
+        monkeypatch.setattr(update_readme, "fetch_most_recent_projects", lambda: ["project-0001"])
+        watcher.start()
+
+        events: queue.Queue = queue.Queue()
+        stop = threading.Event()
+        receiver = stack_watch.build_server(events, port=0, secret="s3cret")
+        threading.Thread(target=receiver.serve_forever, daemon=True).start()
+        worker = threading.Thread(target=stack_watch.run_events, args=(watcher, events, stop, 0.05), daemon=True)
+        worker.start()
+        url = f"http://127.0.0.1:{receiver.server_address[1]}"
+        yield account, server, watcher, events, url, readme
+        stop.set()
+        worker.join()
+        receiver.shutdown()
+        receiver.server_close()
+
+
+def test_parse_event_maps_webhooks_to_repo_changes():
+    repository = {"full_name": "me/app", "id": 7}
+
+    assert stack_watch.parse_event("push", {"repository": repository}) == stack_watch.Event("repo", "me/app", 7)
+    assert stack_watch.parse_event("repository", {"action": "created", "repository": repository}).kind == "repo"
+    assert stack_watch.parse_event("repository", {"action": "deleted", "repository": repository}).kind == "deleted"
+    assert stack_watch.parse_event("star", {"repository": repository}) is None
+    assert stack_watch.parse_event("heartbeat", {}) == stack_watch.Event("heartbeat")
+
+
+def test_push_rescans_only_the_pushed_repository(watched):
+    account, server, watcher, events, url, readme = watched
+    assert "Current Focus" in readme.read_text(encoding="utf-8")
+    assert "Django" not in readme.read_text(encoding="utf-8")
+
+    repo = account.push(
+        "bench-user/project-0003", {"requirements.txt": "django\n"}, pushed_at="2026-10-18T09:00:00Z"
+    )
+    server.reset_counters()
+    for _ in range(3):
+        assert _post(f"{url}/github", {"repository": repo}, "push", "s3cret") == 202
+    events.join()
+
+    assert "Django" in readme.read_text(encoding="utf-8")
+    assert {path.split("/")[3] for path in server.paths} == {"project-0003"}
+    assert server.metrics()["requests"] <= 4  # repo, languages, tree and the changed manifest
+    snapshots = generate_stack_section.load_snapshots(watcher.snapshot_path)
+    assert snapshots[str(repo["id"])]["pushed_at"] == "2026-10-18T09:00:00Z"
+
+
+def test_created_and_deleted_repositories_update_the_stack(watched):
+    account, server, watcher, events, url, readme = watched
+    repo = account.create(
+        "new-service",
+        {"go.mod": "module x\n\nrequire github.com/redis/go-redis/v9 v9.0.0\n"},
+        {"Go": 50_000_000},
+        pushed_at="2026-10-18T10:00:00Z",
+    )
+    server.reset_counters()
+
+    assert _post(f"{url}/github", {"action": "created", "repository": repo}, "repository", "s3cret") == 202
+    events.join()
+    assert "Redis" in readme.read_text(encoding="utf-8")
+    assert {path.split("/")[3] for path in server.paths} == {"new-service"}
+
+    server.reset_counters()
+    assert _post(f"{url}/github", {"action": "deleted", "repository": repo}, "repository", "s3cret") == 202
+    events.join()
+    assert server.metrics()["requests"] == 0
+    assert str(repo["id"]) not in generate_stack_section.load_snapshots(watcher.snapshot_path)
+
+
+def test_heartbeats_refresh_only_the_projects_section(watched, monkeypatch):
+    account, server, watcher, events, url, readme = watched
+    monkeypatch.setattr(update_readme, "fetch_most_recent_projects", lambda: ["project-0004"])
+    server.reset_counters()
+
+    assert _post(f"{url}/heartbeat", {}, secret="s3cret") == 202
+    events.join()
+
+    assert "project-0004" in readme.read_text(encoding="utf-8")
+    assert server.metrics()["requests"] == 0
+
+
+def test_unsigned_or_unknown_deliveries_are_not_queued(watched):
+    account, server, watcher, events, url, readme = watched
+
+    assert _post(f"{url}/github", {"repository": account.repos[0]}, "push") == 401
+    assert _post(f"{url}/github", {"repository": account.repos[0]}, "star", "s3cret") == 204
+    assert events.unfinished_tasks == 0
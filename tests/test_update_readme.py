@@ -141,3 +141,316 @@ def test_filter_existing_github_projects_keeps_scanning_until_max():
     filtered = filter_existing_github_projects(projects, max_projects=3, repo_exists=existing.__contains__)
 
     assert filtered == ["scoopcryo", "lore", "imgvault"]
+
+
+def test_repo_index_normalizes_case_and_separators():
+    from update_readme import RepoIndex
+
+    index = RepoIndex(["Wall-You-Need-Next-Gen", "imgvault", "site.github.io"])
+
+    assert "wall you need next gen" in index
+    assert "Wall_You_Need_Next_Gen" in index
+    assert "ImgVault" in index
+    assert "site-github-io" in index
+    assert "hi" not in index
+    assert "" not in index
+    assert index.canonical("wall you need next gen") == "Wall-You-Need-Next-Gen"
+
+
+def test_repo_index_filter_keeps_recency_order():
+    from update_readme import RepoIndex
+
+    index = RepoIndex(["scoopcryo", "Lore", "imgvault"])
+    projects = ["thread-one", "lore", "thread-two", "scoopcryo", "imgvault"]
+
+    filtered = filter_existing_github_projects(projects, max_projects=2, repo_exists=index.__contains__)
+
+    assert [index.canonical(project) for project in filtered] == ["Lore", "scoopcryo"]
+
+
+def test_repo_index_filter_links_each_repo_once():
+    from update_readme import RepoIndex
+
+    index = RepoIndex(["wall-you-need", "lore", "imgvault"])
+    projects = ["Wall You Need", "wall-you-need", "lore", "imgvault"]
+
+    filtered = filter_existing_github_projects(projects, repo_exists=index.__contains__)
+
+    assert [index.canonical(project) for project in filtered] == ["wall-you-need", "lore", "imgvault"]
+
+
+def test_load_repo_index_reuses_cached_listing_until_ttl(tmp_path):
+    from update_readme import load_repo_index
+
+    path = str(tmp_path / "repo_index.json")
+    fetches = []
+    clock = [1000.0]
+
+    def fetch():
+        fetches.append(clock[0])
+        return ["lore"]
+
+    assert "lore" in load_repo_index(path, ttl=60, fetch=fetch, now=lambda: clock[0])
+    clock[0] += 30
+    assert "lore" in load_repo_index(path, ttl=60, fetch=fetch, now=lambda: clock[0])
+    clock[0] += 60
+    load_repo_index(path, ttl=60, fetch=fetch, now=lambda: clock[0])
+
+    assert fetches == [1000.0, 1090.0]
+
+
+def test_load_repo_index_returns_none_when_listing_fails(tmp_path):
+    import requests
+    from update_readme import load_repo_index
+
+    def fetch():
+        raise requests.exceptions.ConnectionError("offline")
+
+    assert load_repo_index(str(tmp_path / "repo_index.json"), fetch=fetch) is None
+
+
+def _sorted_unique_projects(heartbeats):
+    # The original implementation: full stable sort, then first-seen dedupe.
+    ordered = sorted(
+        ((hb["project"], hb["time"]) for hb in heartbeats if hb.get("project")), key=lambda x: x[1], reverse=True
+    )
+    seen = set()
+    return [project for project, _ in ordered if not (project in seen or seen.add(project))]
+
+
+def test_heartbeat_summary_matches_sorted_dedupe():
+    import random
+    from update_readme import HeartbeatSummary
+
+    rng = random.Random(7)
+    heartbeats = [
+        {"project": rng.choice(["a", "b", "c", "d", "e", "", None]), "time": float(rng.randint(0, 40))}
+        for _ in range(500)
+    ]
+    summary = HeartbeatSummary()
+    for heartbeat in heartbeats:
+        summary.add(heartbeat)
+
+    assert list(summary.recent_projects()) == _sorted_unique_projects(heartbeats)
+    assert summary.count == 500
+
+
+def test_fetch_most_recent_projects_streams_heartbeats(monkeypatch, capsys, tmp_path):
+    import io
+    import json
+    import requests
+    import update_readme
+
+    heartbeats = [{"project": f"p{i % 50}", "time": 1_000.0 + i, "entity": "x" * 200} for i in range(2_000)]
+    body = json.dumps({"data": heartbeats, "total": len(heartbeats)}).encode()
+    requested = []
+
+    def fake_get(url, headers=None, params=None, cache=None, stream=False, **kwargs):
+        requested.append((params, cache, stream))
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(body)
+        return response
+
+    monkeypatch.setattr(update_readme, "WAKATIME_API_KEY", "key")
+    monkeypatch.setattr(update_readme, "WAKATIME_USERNAME", "me")
+    monkeypatch.setattr(update_readme, "HEARTBEAT_STATE_PATH", str(tmp_path / "heartbeats.json"))
+    monkeypatch.setattr(update_readme, "HEARTBEAT_DAYS_PATH", str(tmp_path / "days.json"))
+    monkeypatch.setattr(update_readme, "HEARTBEAT_WINDOW_DAYS", 1)
+    monkeypatch.setattr(update_readme.http_client, "get", fake_get)
+    monkeypatch.setattr(update_readme, "load_repo_index", lambda: update_readme.RepoIndex(["P40", "p47", "p1"]))
+
+    assert update_readme.fetch_most_recent_projects() == ["p47", "P40", "p1"]
+    assert requested[0][1:] == (None, True)
+    output = capsys.readouterr().out
+    assert "2000 heartbeats (2000 new) across 50 projects; most recent: p49, p48, p47, p46, p45 (+45 more)" in output
+    assert "x" * 200 not in output
+
+
+def test_heartbeat_state_folds_only_new_heartbeats_and_resets_on_new_day(monkeypatch, tmp_path):
+    import update_readme
+    from update_readme import HeartbeatSummary, load_heartbeat_state, save_heartbeat_state
+
+    monkeypatch.setattr(update_readme, "WAKATIME_USERNAME", "me")
+    path = str(tmp_path / "heartbeats.json")
+    morning = [{"project": "a", "time": 100.0}, {"project": "b", "time": 200.0}]
+    afternoon = morning + [{"project": "a", "time": 300.0}, {"project": "c", "time": 250.0}]
+
+    first = load_heartbeat_state("2026-10-18", path)
+    for heartbeat in morning:
+        first.add(heartbeat)
+    first.validators = {"If-None-Match": '"v1"'}
+    save_heartbeat_state(first, path)
+
+    second = load_heartbeat_state("2026-10-18", path)
+    for heartbeat in afternoon:
+        second.add(heartbeat)
+
+    assert second.new == 2
+    assert second.count == 4
+    assert second.cursor == 300.0
+    assert second.validators == {"If-None-Match": '"v1"'}
+    assert list(second.recent_projects()) == _sorted_unique_projects(afternoon) == ["a", "c", "b"]
+
+    save_heartbeat_state(second, path)
+    next_day = load_heartbeat_state("2026-10-19", path)
+    assert isinstance(next_day, HeartbeatSummary)
+    assert (next_day.cursor, next_day.count, next_day.last_seen, next_day.validators) == (None, 0, {}, {})
+
+
+def test_unchanged_heartbeats_reuse_saved_state(monkeypatch, tmp_path):
+    import io
+    import requests
+    import update_readme
+
+    sent = []
+
+    def fake_get(url, headers=None, params=None, cache=None, stream=False, **kwargs):
+        sent.append(headers)
+        response = requests.Response()
+        response.status_code = 304
+        response.raw = io.BytesIO(b"")
+        return response
+
+    monkeypatch.setattr(update_readme, "WAKATIME_USERNAME", "me")
+    monkeypatch.setattr(update_readme.http_client, "get", fake_get)
+    path = str(tmp_path / "heartbeats.json")
+    saved = update_readme.HeartbeatSummary("2026-10-18", 50.0, {"lore": (50.0, 3)}, 3, {"If-None-Match": '"v1"'})
+    update_readme.save_heartbeat_state(saved, path)
+
+    summary = update_readme.fetch_heartbeats(update_readme.load_heartbeat_state("2026-10-18", path))
+
+    assert sent[0]["If-None-Match"] == '"v1"'
+    assert list(summary.recent_projects()) == ["lore"]
+    assert summary.new == 0
+
+
+def test_update_readme_leaves_unchanged_readme_alone(tmp_path, capsys):
+    import os
+    from update_readme import build_projects_section, update_readme
+
+    path = tmp_path / "README.md"
+    path.write_text("Intro\n\n" + build_projects_section(build_new_projects_text(["lore"])) + "## Contributors\n")
+    os.utime(path, (1_000, 1_000))
+
+    update_readme(["lore"], readme_path=str(path))
+
+    assert path.stat().st_mtime == 1_000
+    assert "README.md already up to date" in capsys.readouterr().out
+
+
+def test_heartbeats_changed_compares_latest_heartbeat_with_cursor(monkeypatch, tmp_path):
+    from datetime import datetime
+    import update_readme
+
+    monkeypatch.setattr(update_readme, "WAKATIME_USERNAME", "me")
+    path = str(tmp_path / "heartbeats.json")
+    days_path = str(tmp_path / "heartbeat_days.json")
+    noon = datetime(2026, 10, 18, 12).timestamp()
+    update_readme.save_heartbeat_state(update_readme.HeartbeatSummary("2026-10-18", noon, {"lore": (noon, 1)}, 1), path)
+
+    assert update_readme.heartbeats_changed("2026-10-18", noon, path, days_path) is False
+    assert update_readme.heartbeats_changed("2026-10-18", noon + 60, path, days_path) is True
+    assert update_readme.heartbeats_changed("2026-10-18", None, path, days_path) is True
+    # Nothing yet on a new day, and yesterday was seen up to its last heartbeat.
+    assert update_readme.heartbeats_changed("2026-10-19", noon, path, days_path) is False
+    assert update_readme.heartbeats_changed("2026-10-19", noon + 86_400, path, days_path) is True
+
+
+def test_heartbeats_logged_before_midnight_count_on_the_next_day(monkeypatch, tmp_path):
+    from datetime import datetime
+    import update_readme
+
+    monkeypatch.setattr(update_readme, "WAKATIME_USERNAME", "me")
+    path = str(tmp_path / "heartbeats.json")
+    days_path = str(tmp_path / "heartbeat_days.json")
+    noon = datetime(2026, 10, 18, 12).timestamp()
+    late = datetime(2026, 10, 18, 23, 30).timestamp()
+    update_readme.save_heartbeat_state(update_readme.HeartbeatSummary("2026-10-18", noon, {"lore": (noon, 1)}, 1), path)
+
+    assert update_readme.heartbeats_changed("2026-10-19", late, path, days_path) is True
+
+    # Once the finished day is cached in full, the same heartbeat is nothing new.
+    update_readme.save_past_days({"2026-10-18": update_readme.HeartbeatSummary("2026-10-18", late, {}, 2)}, days_path)
+    assert update_readme.heartbeats_changed("2026-10-19", late, path, days_path) is False
+    # Days that have left the window cannot change what is shown.
+    assert update_readme.heartbeats_changed("2026-10-25", late, path, str(tmp_path / "none.json")) is False
+
+
+def test_fetch_last_heartbeat_at_reads_wakapi_user(monkeypatch):
+    import update_readme
+
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"data": {"username": "me", "last_heartbeat_at": "2026-10-18T12:00:00Z"}}
+
+    monkeypatch.setattr(update_readme, "WAKATIME_API_KEY", "key")
+    monkeypatch.setattr(update_readme, "WAKATIME_USERNAME", "me")
+    monkeypatch.setattr(update_readme.http_client, "get", lambda url, **kwargs: FakeResponse())
+
+    assert update_readme.fetch_last_heartbeat_at() == 1_792_324_800.0
+
+
+def test_window_ranks_across_days_and_only_refetches_today(monkeypatch, tmp_path, capsys):
+    import io
+    import json
+    from datetime import datetime
+
+    import requests
+    import update_readme
+
+    days = {
+        "2026-10-16": [{"project": "old", "time": 100.0}, {"project": "both", "time": 110.0}],
+        "2026-10-17": [{"project": "late-night", "time": 200.0}],
+        "2026-10-18": [{"project": "both", "time": 300.0}],
+        "2026-10-19": [{"project": "fresh", "time": 400.0}],
+    }
+    requested = []
+
+    def fake_get(url, headers=None, params=None, cache=None, stream=False, **kwargs):
+        requested.append(params["date"])
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(json.dumps({"data": days[params["date"]]}).encode())
+        return response
+
+    class FakeDatetime(datetime):
+        today = "2026-10-18"
+
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromisoformat(cls.today)
+
+    monkeypatch.setattr(update_readme, "WAKATIME_API_KEY", "key")
+    monkeypatch.setattr(update_readme, "WAKATIME_USERNAME", "me")
+    monkeypatch.setattr(update_readme, "HEARTBEAT_STATE_PATH", str(tmp_path / "heartbeats.json"))
+    monkeypatch.setattr(update_readme, "HEARTBEAT_DAYS_PATH", str(tmp_path / "days.json"))
+    monkeypatch.setattr(update_readme, "HEARTBEAT_WINDOW_DAYS", 3)
+    monkeypatch.setattr(update_readme, "datetime", FakeDatetime)
+    monkeypatch.setattr(update_readme.http_client, "get", fake_get)
+    projects = ["old", "both", "late-night", "fresh"]
+    monkeypatch.setattr(update_readme, "load_repo_index", lambda: update_readme.RepoIndex(projects))
+
+    assert update_readme.fetch_most_recent_projects() == ["both", "late-night", "old"]
+    assert sorted(requested) == ["2026-10-16", "2026-10-17", "2026-10-18"]
+    assert "4 heartbeats (4 new) across 3 projects" in capsys.readouterr().out
+
+    requested.clear()
+    assert update_readme.fetch_most_recent_projects() == ["both", "late-night", "old"]
+    assert requested == ["2026-10-18"]
+
+    # After midnight the section keeps yesterday's work and the oldest day drops
+    # out. Yesterday gets one last catch-up request, then only today is fetched.
+    requested.clear()
+    FakeDatetime.today = "2026-10-19"
+    assert update_readme.fetch_most_recent_projects() == ["fresh", "both", "late-night"]
+    assert requested == ["2026-10-18", "2026-10-19"]
+    with open(tmp_path / "days.json", encoding="utf-8") as file:
+        assert sorted(json.load(file)["days"]) == ["2026-10-17", "2026-10-18"]
+
+    requested.clear()
+    assert update_readme.fetch_most_recent_projects() == ["fresh", "both", "late-night"]
+    assert requested == ["2026-10-19"]
@@ -1,12 +1,23 @@
 import requests
 import re
 import base64
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 import sys
 import os
+import heapq
+import json
+import time
 from html import escape
 from dotenv import load_dotenv
 
+import http_cache
+import http_client
+import json_stream
+import readme_sections
+import run_metrics
+from run_metrics import timed
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -14,6 +25,14 @@ WAKATIME_API_KEY = os.getenv('WAKATIME_API_KEY')
 WAKATIME_USERNAME = os.getenv('WAKATIME_USERNAME')
 GITHUB_USERNAME = os.getenv('GITHUB_USERNAME', 'FahadBinHussain')
 GITHUB_TOKEN = os.getenv('PROFILE_STATS_TOKEN') or os.getenv('GITHUB_TOKEN')
+GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com')
+REPO_INDEX_PATH = os.getenv('REPO_INDEX_PATH', os.path.join('.cache', 'repo_index.json'))
+REPO_INDEX_TTL = int(os.getenv('REPO_INDEX_TTL', '3600'))
+HEARTBEAT_STATE_PATH = os.getenv('HEARTBEAT_STATE_PATH', os.path.join('.cache', 'heartbeat_state.json'))
+HEARTBEAT_DAYS_PATH = os.getenv('HEARTBEAT_DAYS_PATH', os.path.join('.cache', 'heartbeat_days.json'))
+# Days of activity ranked for "Current Focus", including today.
+HEARTBEAT_WINDOW_DAYS = max(int(os.getenv('HEARTBEAT_WINDOW_DAYS', '3')), 1)
+HEARTBEAT_FETCH_WORKERS = 4
 
 # Set the default encoding to utf-8 where available
 try:
@@ -30,19 +49,27 @@ else:
     headers = {}
 
 # API base URL for fetching heartbeats
-HEARTBEATS_API_URL = f"https://wakapi-qt1b.onrender.com/api/compat/wakatime/v1/users/{WAKATIME_USERNAME}/heartbeats"
+WAKAPI_USER_URL = f"https://wakapi-qt1b.onrender.com/api/compat/wakatime/v1/users/{WAKATIME_USERNAME}"
+HEARTBEATS_API_URL = f"{WAKAPI_USER_URL}/heartbeats"
+FORCE_RUN = os.getenv('HEARTBEATS_FORCE', '') == '1'
+
+def github_headers():
+    repo_headers = {}
+    if GITHUB_TOKEN:
+        repo_headers['Authorization'] = f"Bearer {GITHUB_TOKEN}"
+    return repo_headers
 
+
+@timed()
 def github_repo_exists(project_name):
     if not project_name:
         return False
 
-    repo_url = f"https://api.github.com/repos/{GITHUB_USERNAME}/{project_name}"
-    repo_headers = {}
-    if GITHUB_TOKEN:
-        repo_headers['Authorization'] = f"Bearer {GITHUB_TOKEN}"
+    repo_url = f"{GITHUB_API_URL}/repos/{GITHUB_USERNAME}/{project_name}"
+    repo_headers = github_headers()
 
     try:
-        response = requests.get(repo_url, headers=repo_headers, timeout=10)
+        response = http_client.get(repo_url, headers=repo_headers, timeout=10)
     except requests.exceptions.RequestException as err:
         print(f"Could not verify GitHub repo for project {project_name}: {err}")
         return False
@@ -58,72 +85,383 @@ def github_repo_exists(project_name):
     return False
 
 
+def normalize_repo_name(name):
+    # Wakapi reports local folder names, which may differ from the repo name
+    # in case or in how words are separated ("Wall You Need" vs "wall-you-need").
+    return re.sub(r'[\s._-]+', '-', name.strip().lower()).strip('-')
+
+
+class RepoIndex:
+    def __init__(self, names):
+        self.names = list(names)
+        self.by_key = {normalize_repo_name(name): name for name in self.names}
+
+    def __contains__(self, project_name):
+        return bool(project_name) and normalize_repo_name(project_name) in self.by_key
+
+    def canonical(self, project_name):
+        return self.by_key.get(normalize_repo_name(project_name), project_name)
+
+
+@timed()
+def fetch_repo_names():
+    if GITHUB_TOKEN:
+        url = f"{GITHUB_API_URL}/user/repos"
+        params = {'affiliation': 'owner', 'visibility': 'all', 'per_page': 100}
+    else:
+        url = f"{GITHUB_API_URL}/users/{GITHUB_USERNAME}/repos"
+        params = {'type': 'owner', 'per_page': 100}
+
+    names = []
+    page = 1
+    while True:
+        response = http_client.get(url, headers=github_headers(), params={**params, 'page': page})
+        response.raise_for_status()
+        batch = response.json()
+        names.extend(
+            repo['name'] for repo in batch
+            if repo.get('owner', {}).get('login', '').lower() == GITHUB_USERNAME.lower()
+        )
+        if len(batch) < params['per_page']:
+            return names
+        page += 1
+
+
+def load_repo_index(path=REPO_INDEX_PATH, ttl=REPO_INDEX_TTL, fetch=fetch_repo_names, now=time.time):
+    """Return a RepoIndex for GITHUB_USERNAME, refreshing the cached copy after ``ttl`` seconds.
+
+    Returns None when the listing cannot be fetched, so callers can fall back
+    to checking repositories one by one.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            cached = json.load(file)
+        if cached.get('username') == GITHUB_USERNAME and now() - cached.get('fetched_at', 0) < ttl:
+            return RepoIndex(cached['names'])
+    except (OSError, ValueError, KeyError):
+        pass
+
+    try:
+        names = fetch()
+    except (requests.exceptions.RequestException, ValueError) as err:
+        print(f"Could not list GitHub repos for {GITHUB_USERNAME}: {err}")
+        return None
+
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'username': GITHUB_USERNAME, 'fetched_at': now(), 'names': names}, file)
+    except OSError as err:
+        print(f"Could not cache GitHub repo index: {err}")
+    return RepoIndex(names)
+
+
 def filter_existing_github_projects(projects, max_projects=3, repo_exists=github_repo_exists):
     selected_projects = []
+    seen = set()
 
     for project in projects:
         if len(selected_projects) >= max_projects:
             break
 
+        # "Wall You Need" and "wall-you-need" are the same repo; keep the most recent.
+        key = normalize_repo_name(project)
+        if key in seen:
+            continue
         if repo_exists(project):
             selected_projects.append(project)
+            seen.add(key)
 
     return selected_projects
 
 
+class HeartbeatSummary:
+    """Latest heartbeat time per project for one day, built up across runs.
+
+    Heartbeats at or before ``since`` were folded in by an earlier run and are
+    skipped, so each run only does work for new activity. Ties on time keep
+    the order the heartbeats arrived in, matching a stable sort of the full list.
+    """
+
+    def __init__(self, day=None, cursor=None, last_seen=None, count=0, validators=None):
+        self.day = day
+        self.since = cursor
+        self.cursor = cursor
+        self.last_seen = dict(last_seen or {})
+        self.count = count
+        self.new = 0
+        self.validators = dict(validators or {})
+
+    def add(self, heartbeat):
+        if not isinstance(heartbeat, dict) or 'time' not in heartbeat:
+            return
+        timestamp = float(heartbeat['time'])
+        if self.since is not None and timestamp <= self.since:
+            return
+        self.count += 1
+        self.new += 1
+        self.cursor = timestamp if self.cursor is None else max(self.cursor, timestamp)
+        project = heartbeat.get('project')
+        if not project:
+            return
+        seen = self.last_seen.get(project)
+        if seen is None or timestamp > seen[0]:
+            self.last_seen[project] = (timestamp, self.count)
+
+    def merge(self, other):
+        """Fold another day's summary in; a project's latest heartbeat wins."""
+        self.count += other.count
+        self.new += other.new
+        for project, seen in other.last_seen.items():
+            current = self.last_seen.get(project)
+            if current is None or seen[0] > current[0]:
+                self.last_seen[project] = seen
+        return self
+
+    def _ranked(self):
+        return ((-timestamp, order, project) for project, (timestamp, order) in self.last_seen.items())
+
+    def recent_projects(self):
+        # Popped lazily, so callers that stop after a few matches only pay for those.
+        heap = list(self._ranked())
+        heapq.heapify(heap)
+        while heap:
+            yield heapq.heappop(heap)[2]
+
+    def describe(self, limit=5):
+        preview = heapq.nsmallest(limit, self._ranked())
+        names = ', '.join(project for _, _, project in preview)
+        more = len(self.last_seen) - len(preview)
+        if more > 0:
+            names += f' (+{more} more)'
+        return (
+            f"{self.count} heartbeats ({self.new} new) across {len(self.last_seen)} projects; "
+            f"most recent: {names or 'none'}"
+        )
+
+    def to_state(self):
+        return {
+            'username': WAKATIME_USERNAME,
+            'day': self.day,
+            'cursor': self.cursor,
+            'count': self.count,
+            'last_seen': {project: list(seen) for project, seen in self.last_seen.items()},
+            'validators': self.validators,
+        }
+
+
+def load_heartbeat_state(day, path=None):
+    """Return the saved summary for ``day``, or an empty one after a day rollover."""
+    path = path or HEARTBEAT_STATE_PATH
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            state = json.load(file)
+        if state.get('username') == WAKATIME_USERNAME and state.get('day') == day:
+            return HeartbeatSummary(
+                day,
+                state['cursor'],
+                {project: tuple(seen) for project, seen in state['last_seen'].items()},
+                state['count'],
+                state.get('validators'),
+            )
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return HeartbeatSummary(day)
+
+
+def save_heartbeat_state(summary, path=None):
+    path = path or HEARTBEAT_STATE_PATH
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(summary.to_state(), file)
+        os.replace(tmp_path, path)
+    except OSError as err:
+        print(f"Could not save heartbeat state: {err}")
+
+
+def fetch_heartbeats(summary):
+    """Stream ``summary.day``'s heartbeats into ``summary`` without buffering the response.
+
+    The endpoint only filters by date, so the request is made conditional on
+    the previous response and everything up to the cursor is skipped.
+    """
+    request_headers = {**headers, **summary.validators}
+    response = http_client.get(
+        HEARTBEATS_API_URL, headers=request_headers, params={'date': summary.day}, cache=None, stream=True
+    )
+    with response:
+        print(f"Response status code: {response.status_code}")
+        if response.status_code == 304:
+            return summary
+        response.raise_for_status()
+        json_stream.parse_response(response, json_stream.ArrayStreamParser('data', summary.add))
+        summary.validators = {}
+        if response.headers.get('ETag'):
+            summary.validators['If-None-Match'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            summary.validators['If-Modified-Since'] = response.headers['Last-Modified']
+    return summary
+
+
+def window_past_days(today, window=None):
+    """Return the finished days in the window ending at ``today``, oldest first."""
+    window = window or HEARTBEAT_WINDOW_DAYS
+    end = date.fromisoformat(today)
+    return [(end - timedelta(days=offset)).isoformat() for offset in range(window - 1, 0, -1)]
+
+
+def load_past_days(path=None):
+    path = path or HEARTBEAT_DAYS_PATH
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            state = json.load(file)
+        if state.get('username') == WAKATIME_USERNAME:
+            return {
+                day: HeartbeatSummary(
+                    day, None, {project: tuple(seen) for project, seen in saved['last_seen'].items()}, saved['count']
+                )
+                for day, saved in state['days'].items()
+            }
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        pass
+    return {}
+
+
+def save_past_days(summaries, path=None):
+    path = path or HEARTBEAT_DAYS_PATH
+    days = {
+        day: {'count': summary.count, 'last_seen': {project: list(seen) for project, seen in summary.last_seen.items()}}
+        for day, summary in summaries.items()
+    }
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'username': WAKATIME_USERNAME, 'days': days}, file)
+        os.replace(tmp_path, path)
+    except OSError as err:
+        print(f"Could not save past heartbeat days: {err}")
+
+
+def fetch_past_days(days, path=None):
+    """Return summaries for finished ``days``, fetching only those not cached yet.
+
+    A finished day's heartbeats no longer change, so once fetched a day is
+    kept for as long as it stays in the window. Missing days are fetched in
+    parallel; the day that was "today" on the previous run resumes from its
+    saved state. A day that fails is left out and retried on the next run.
+    """
+    cached = load_past_days(path)
+    summaries = {day: cached[day] for day in days if day in cached}
+    missing = [day for day in days if day not in cached]
+    if missing:
+        print(f"Fetching heartbeats for {len(missing)} past days: {', '.join(missing)}")
+
+        def fetch(day):
+            try:
+                return fetch_heartbeats(load_heartbeat_state(day))
+            except (requests.exceptions.RequestException, ValueError, TypeError) as err:
+                print(f"Could not fetch heartbeats for {day}: {err}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(len(missing), HEARTBEAT_FETCH_WORKERS)) as executor:
+            for day, summary in zip(missing, executor.map(fetch, missing)):
+                if summary is not None:
+                    summaries[day] = summary
+    if missing or set(cached) != set(summaries):
+        save_past_days({day: summaries[day] for day in days if day in summaries}, path)
+    return summaries
+
+
+def fetch_last_heartbeat_at():
+    """Return the user's latest heartbeat as a Unix timestamp, or None if Wakapi does not say."""
+    if WAKATIME_API_KEY is None or WAKATIME_USERNAME is None:
+        return None
+    try:
+        response = http_client.get(WAKAPI_USER_URL, headers=headers, cache=None)
+        response.raise_for_status()
+        value = response.json()['data'].get('last_heartbeat_at')
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp() if value else None
+    except (requests.exceptions.RequestException, ValueError, KeyError, AttributeError, TypeError) as err:
+        print(f"Could not read the latest heartbeat time: {err}")
+        return None
+
+
+def heartbeats_changed(day, last_heartbeat_at, path=None, days_path=None):
+    """Tell whether the window ending at ``day`` may have heartbeats the saved state has not seen.
+
+    The latest heartbeat is compared with the cursor of the day it belongs
+    to, so work logged late yesterday still counts on the first run after
+    midnight. Unknown times count as changed, so a failed check never hides
+    new activity.
+    """
+    if last_heartbeat_at is None:
+        return True
+    heartbeat_day = datetime.fromtimestamp(last_heartbeat_at).strftime('%Y-%m-%d')
+    if heartbeat_day < day and (
+        heartbeat_day not in window_past_days(day) or heartbeat_day in load_past_days(days_path)
+    ):
+        # Outside the window, or a finished day that was already fetched in full.
+        return False
+    cursor = load_heartbeat_state(heartbeat_day, path).cursor
+    return cursor is None or last_heartbeat_at > cursor
+
+
+@timed()
 def fetch_most_recent_projects():
     # Get the current date in YYYY-MM-DD format
     if WAKATIME_API_KEY is None or WAKATIME_USERNAME is None:
         print("WAKATIME_API_KEY and WAKATIME_USERNAME are not set. Skipping fetch.")
         return None
     current_date = datetime.now().strftime('%Y-%m-%d')
-    response = requests.get(HEARTBEATS_API_URL, headers=headers, params={'date': current_date})
-    print(f"Response status code: {response.status_code}")
-    print(f"Response headers: {response.headers}")
-    print(f"Response content: {response.content.decode('utf-8')}")
-
+    # Past days first: the saved state may still hold yesterday's partial summary.
+    past_days = fetch_past_days(window_past_days(current_date))
     try:
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        data = response.json()
-        print(f"API response data: {data}")  # Debug statement
-        heartbeats = data.get('data', [])
+        summary = fetch_heartbeats(load_heartbeat_state(current_date))
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error occurred: {http_err}")
         return None
     except requests.exceptions.RequestException as err:
         print(f"Error occurred: {err}")
         return None
-    except ValueError as json_err:
+    except (ValueError, TypeError) as json_err:
         print(f"JSON decode error: {json_err}")
         return None
-
-    # Check if heartbeats data is a list and not empty
-    if isinstance(heartbeats, list) and heartbeats:
-        # Print the fetched heartbeats for debugging
-        print(f"Fetched heartbeats: {heartbeats}")
-
-        # Extract project names and timestamps from heartbeats
-        projects_with_timestamps = [(hb['project'], hb['time']) for hb in heartbeats if 'project' in hb and hb['project']]
-
-        # Sort projects by timestamp in descending order (most recent first)
-        projects_with_timestamps.sort(key=lambda x: x[1], reverse=True)
-
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_projects = [x[0] for x in projects_with_timestamps if not (x[0] in seen or seen.add(x[0]))]
-        print(f"Unique projects: {unique_projects}")  # Debug statement
-
-        if unique_projects:
-            # Keep scanning recent Wakapi projects until we find real GitHub repos.
-            most_recent_projects = filter_existing_github_projects(unique_projects)
-            print(f"Most recent projects: {most_recent_projects}")
-            return most_recent_projects or None
-        else:
-            print("No projects found in heartbeats.")
-            return None
-    else:
+    save_heartbeat_state(summary)
+    if past_days:
+        today = summary
+        summary = HeartbeatSummary()
+        for day in sorted(past_days):
+            summary.merge(past_days[day])
+        summary.merge(today)
+
+    if not summary.count:
         print("No heartbeats found or heartbeats list is invalid.")
         return None
+    print(f"Fetched {summary.describe()}")
+    if not summary.last_seen:
+        print("No projects found in heartbeats.")
+        return None
+
+    # Keep scanning recent Wakapi projects until we find real GitHub repos.
+    repo_index = load_repo_index()
+    if repo_index is None:
+        most_recent_projects = filter_existing_github_projects(summary.recent_projects())
+    else:
+        most_recent_projects = [
+            repo_index.canonical(project)
+            for project in filter_existing_github_projects(summary.recent_projects(), repo_exists=repo_index.__contains__)
+        ]
+    print(f"Most recent projects: {most_recent_projects}")
+    return most_recent_projects or None
 
 def build_new_projects_text(most_recent_projects, max_projects=3):
     if not most_recent_projects:
@@ -144,21 +482,26 @@ def build_new_projects_text(most_recent_projects, max_projects=3):
         return f"<p>🔭 Currently actively developing my {', '.join(links[:-1])} &amp; {links[-1]} projects.</p>"
 
 
-PROJECTS_SECTION_START = "<!--START_SECTION:current-projects-->"
-PROJECTS_SECTION_END = "<!--END_SECTION:current-projects-->"
+PROJECTS_SECTION = "current-projects"
+PROJECTS_SECTION_START = readme_sections.start_marker(PROJECTS_SECTION)
+PROJECTS_SECTION_END = readme_sections.end_marker(PROJECTS_SECTION)
 CONTRIBUTORS_HEADING_RE = re.compile(r"^## Contributors\s*$", re.M)
+# Match old Markdown bullets and the HTML paragraph generated now.
+PROJECTS_LINE_RE = re.compile(
+    r"^\s*(?:- 🔭 Currently actively developing my .*?project(?:s)?\.|<p>🔭 Currently actively developing my .*?project(?:s)?\.</p>)\s*$\r?\n?",
+    re.M,
+)
+
+
+def build_projects_body(new_projects_text: str) -> str:
+    return f"\n\n## Current Focus\n\n{new_projects_text}\n\n"
 
 
 def build_projects_section(new_projects_text: str) -> str:
-    return (
-        f"{PROJECTS_SECTION_START}\n\n"
-        "## Current Focus\n\n"
-        f"{new_projects_text}\n\n"
-        f"{PROJECTS_SECTION_END}\n\n"
-    )
+    return f"{PROJECTS_SECTION_START}{build_projects_body(new_projects_text)}{PROJECTS_SECTION_END}\n\n"
 
 
-def replace_projects_block(readme_content: str, new_projects_text: str) -> str:
+def replace_projects_block(readme_content: str, new_projects_text: str, spans=None) -> str:
     """Replace the generated current-projects block and keep it before contributors.
 
     The README is updated by GitHub Actions, so the project names stay dynamic;
@@ -167,11 +510,15 @@ def replace_projects_block(readme_content: str, new_projects_text: str) -> str:
     if not new_projects_text:
         return readme_content
 
-    # Match old Markdown bullets and the HTML paragraph generated now.
-    block_re = re.compile(
-        r"^\s*(?:- 🔭 Currently actively developing my .*?project(?:s)?\.|<p>🔭 Currently actively developing my .*?project(?:s)?\.</p>)\s*$\r?\n?",
-        re.M,
-    )
+    spans = readme_sections.parse_sections(readme_content) if spans is None else spans
+    project_spans = [span for span in spans if span.name == PROJECTS_SECTION]
+    if len(project_spans) == 1:
+        span = project_spans[0]
+        if not PROJECTS_LINE_RE.search(readme_content[: span.start] + readme_content[span.end :]):
+            # The usual case: one marked section and nothing to migrate.
+            return readme_sections.replace_sections(
+                readme_content, {PROJECTS_SECTION: build_projects_body(new_projects_text)}, spans
+            )
 
     section_re = re.compile(
         rf"{re.escape(PROJECTS_SECTION_START)}.*?{re.escape(PROJECTS_SECTION_END)}\s*",
@@ -181,7 +528,7 @@ def replace_projects_block(readme_content: str, new_projects_text: str) -> str:
     # Remove older generated paragraphs and any previous marked section, then
     # reinsert the one generated block in the stable spot.
     content_clean = section_re.sub("", readme_content)
-    content_clean = block_re.sub("", content_clean)
+    content_clean = PROJECTS_LINE_RE.sub("", content_clean)
     new_section = build_projects_section(new_projects_text)
 
     if CONTRIBUTORS_HEADING_RE.search(content_clean):
@@ -192,6 +539,7 @@ def replace_projects_block(readme_content: str, new_projects_text: str) -> str:
     return content_clean + "\n" + new_section
 
 
+@timed()
 def update_readme(most_recent_projects, readme_path='README.md'):
     if not most_recent_projects:
         print("No recent projects found to update README.")
@@ -203,29 +551,29 @@ def update_readme(most_recent_projects, readme_path='README.md'):
         print("README.md file not found.")
         return
 
-    try:
-        with open(readme_path, 'r', encoding='utf-8') as file:
-            readme_content = file.read()
-        print("Successfully read README.md")
-    except Exception as e:
-        print(f"Error reading README.md: {e}")
-        return
-
     new_projects_text = build_new_projects_text(most_recent_projects)
 
     if not new_projects_text:
         print("No recent projects found to update README.")
         return
 
-    updated_readme_content = replace_projects_block(readme_content, new_projects_text)
-
     try:
-        with open(readme_path, 'w', encoding='utf-8') as file:
-            file.write(updated_readme_content)
-        print("Successfully updated README.md")
+        changed = readme_sections.update_file(
+            readme_path, edit=lambda content, spans: replace_projects_block(content, new_projects_text, spans)
+        )
     except Exception as e:
-        print(f"Error writing README.md: {e}")
+        print(f"Error updating README.md: {e}")
+        return
+    print("Successfully updated README.md" if changed else "README.md already up to date")
 
 if __name__ == "__main__":
-    most_recent_projects = fetch_most_recent_projects()
-    update_readme(most_recent_projects)
+    force = FORCE_RUN or '--force' in sys.argv[1:]
+    if force or heartbeats_changed(datetime.now().strftime('%Y-%m-%d'), fetch_last_heartbeat_at()):
+        most_recent_projects = fetch_most_recent_projects()
+        update_readme(most_recent_projects)
+    else:
+        print("No new heartbeats since the last run; skipping the projects update.")
+    cache = http_cache.get_cache()
+    if cache is not None:
+        print(cache.summary())
+    run_metrics.emit("update_readme")